@@ -5,5 +5,35 @@ __email__ = 'tsy0716@gmail.com'
 __version__ = '0.1.2'
 
 # imports
-from au_nz_jobs.downloader import Job, Jobs
-from au_nz_jobs.save_jobs import save_jobs, save_jobs_sqlite
+# save_jobs only imports its heavy dependencies when called, so it is safe to import eagerly
+from au_nz_jobs.save_jobs import save_jobs, save_jobs_sqlite, JobsWriter
+
+# Job and Jobs pull in pandas, numpy and requests, they are imported on first access (PEP 562) to keep
+# `import au_nz_jobs` and the command line entry point fast
+_LAZY_ATTRIBUTES = {
+    'Job': 'au_nz_jobs.downloader',
+    'Jobs': 'au_nz_jobs.downloader',
+    'JobsCube': 'au_nz_jobs.analysis',
+    'LocationIndex': 'au_nz_jobs.analysis',
+    'SimilarityIndex': 'au_nz_jobs.analysis',
+}
+
+__all__ = ['Job', 'Jobs', 'JobsCube', 'LocationIndex', 'SimilarityIndex', 'save_jobs', 'save_jobs_sqlite',
+           'JobsWriter']
+
+
+def __getattr__(name):
+    # check if the attribute is one of the lazy attributes
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # import the module and cache the attribute in the package namespace
+    import importlib
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -0,0 +1,6 @@
+"""Allow the package to be run with `python -m au_nz_jobs`."""
+import sys
+
+from au_nz_jobs.cli import main
+
+sys.exit(main())
@@ -0,0 +1,3 @@
+from .cube import JobsCube
+from .location import LocationIndex
+from .similarity import SimilarityIndex
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+# naming convention:
+# dimensions: the columns the jobs are grouped by
+# measures: the mergeable statistics of each group, the sums can be added and the minimums/maximums compared, so a
+# new crawl batch is merged into the cube without going back to the rows
+
+# the dimensions of the cube, listing_day is derived from listing_date
+DIMENSIONS = ['listing_day', 'classification', 'location', 'work_type']
+# the measures of the cube and how to merge them
+MEASURES = {'n_jobs': 'sum', 'n_salary': 'sum', 'salary_sum': 'sum', 'salary_sum_sq': 'sum', 'salary_min': 'min',
+            'salary_max': 'max'}
+
+
+# define the JobsCube class: pre-aggregated job counts and salary statistics
+class JobsCube:
+    """
+    Job counts and salary statistics by listing day, classification, location and work type, maintained incrementally
+    from the output of Jobs.get_all_dfs. The cube has one row per combination of dimensions, so queries group a few
+    thousand rows instead of every job.
+
+    Example:
+        cube = JobsCube()
+        cube.update(df_dict)
+        cube.query(by=['classification'], location='Sydney')
+        cube.save('data/cube.npz')
+    """
+
+    def __init__(self, salary_column: str = 'salary_annualized'):
+        """
+        :param salary_column: the column of jobs_wide the salary statistics are computed on
+        """
+        self.salary_column = salary_column
+        # ids of the jobs already counted, sorted
+        self.job_ids = np.array([], dtype=np.int64)
+        self.cube = self._empty()
+
+    # define a function to get an empty cube
+    @staticmethod
+    def _empty():
+        cube = pd.DataFrame({dim: pd.Categorical([]) for dim in DIMENSIONS})
+        for measure in MEASURES:
+            cube[measure] = pd.Series([], dtype=float)
+        return cube
+
+    def __len__(self):
+        return len(self.cube)
+
+    # define a function to aggregate a jobs dataframe to the cube rows
+    def _aggregate(self, jobs):
+        listing_date = pd.to_datetime(jobs['listing_date'])
+        # days in UTC, the listing dates of SEEK are in UTC
+        if listing_date.dt.tz is not None:
+            listing_date = listing_date.dt.tz_convert(None)
+        salary = (jobs[self.salary_column] if self.salary_column in jobs.columns
+                  else pd.Series(np.nan, index=jobs.index)).astype(float)
+
+        rows = pd.DataFrame({
+            'listing_day': listing_date.dt.floor('D'),
+            'classification': jobs.get('classification'),
+            'location': jobs.get('location'),
+            'work_type': jobs.get('work_type'),
+            'n_jobs': 1.0,
+            'n_salary': salary.notna().astype(float),
+            'salary_sum': salary.fillna(0.0),
+            'salary_sum_sq': salary.fillna(0.0) ** 2,
+            'salary_min': salary,
+            'salary_max': salary,
+        }, index=jobs.index)
+
+        return rows.groupby(DIMENSIONS, dropna=False, observed=True, sort=False).agg(MEASURES).reset_index()
+
+    def update(self, jobs):
+        """
+        Merge a new crawl batch into the cube, the jobs already counted are skipped.
+
+        :param jobs: the dictionary returned by Jobs.get_all_dfs, or its jobs_wide dataframe
+        :return: the number of new jobs counted
+        """
+        if isinstance(jobs, dict):
+            jobs = jobs['jobs_wide']
+        if jobs is None or len(jobs) == 0:
+            return 0
+
+        # skip the jobs already counted, and the duplicates within the batch
+        id_column = 'job_id' if 'job_id' in jobs.columns else 'id'
+        ids = jobs[id_column].astype(np.int64).to_numpy()
+        _, first = np.unique(ids, return_index=True)
+        new = np.zeros(len(ids), dtype=bool)
+        new[first] = True
+        new &= ~np.isin(ids, self.job_ids, assume_unique=False)
+        if not new.any():
+            return 0
+        jobs = jobs[new]
+
+        # merge the aggregates of the batch into the cube
+        cube = pd.concat([self.cube.astype({dim: object for dim in DIMENSIONS}), self._aggregate(jobs)],
+                         ignore_index=True)
+        cube = cube.groupby(DIMENSIONS, dropna=False, sort=True).agg(MEASURES).reset_index()
+        self.cube = cube.astype({dim: 'category' for dim in DIMENSIONS})
+        self.job_ids = np.union1d(self.job_ids, ids[new])
+
+        return int(new.sum())
+
+    def query(self, by=None, **filters):
+        """
+        :param by: the dimensions to group by, e.g. ['listing_day', 'classification'], default to no grouping
+        :param filters: dimension=value or dimension=[values] filters, e.g. location='Sydney'
+        :return: a dataframe of n_jobs, n_salary, salary_mean, salary_std, salary_min and salary_max by the
+            dimensions in by
+        """
+        by = [] if by is None else ([by] if isinstance(by, str) else list(by))
+        for dim in by + list(filters):
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Invalid dimension: {dim}, please choose from {DIMENSIONS}")
+
+        # filter the cube rows
+        cube = self.cube
+        for dim, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if dim == 'listing_day':
+                values = pd.to_datetime(values)
+            cube = cube[cube[dim].isin(values)]
+
+        # merge the measures of the remaining rows
+        if by:
+            result = cube.groupby(by, observed=True, dropna=False).agg(MEASURES)
+        else:
+            result = cube.agg(MEASURES).to_frame().T
+
+        # derive the mean and the sample standard deviation (like pandas, ddof=1) from the sums
+        n_salary = result['n_salary'].where(result['n_salary'] > 0)
+        result['salary_mean'] = result['salary_sum'] / n_salary
+        variance = (result['salary_sum_sq'] - n_salary * result['salary_mean'] ** 2) / (n_salary - 1).where(
+            n_salary > 1)
+        result['salary_std'] = np.sqrt(variance.clip(lower=0))
+        result['n_jobs'] = result['n_jobs'].astype(int)
+        result['n_salary'] = result['n_salary'].astype(int)
+
+        return result[['n_jobs', 'n_salary', 'salary_mean', 'salary_std', 'salary_min', 'salary_max']]
+
+    def save(self, path):
+        """
+        Save the cube as a compressed numpy archive: the dimensions as integer codes plus their categories.
+
+        :param path: the file to write, e.g. data/cube.npz
+        """
+        # the sorted job ids are stored as differences, which compress several times better
+        arrays = {'job_ids_diff': np.diff(self.job_ids, prepend=0), 'salary_column': np.array(self.salary_column)}
+        for dim in DIMENSIONS:
+            categorical = self.cube[dim].cat
+            arrays[f'{dim}_codes'] = categorical.codes.to_numpy()
+            if dim == 'listing_day':
+                arrays[f'{dim}_categories'] = pd.DatetimeIndex(categorical.categories).to_numpy(dtype='datetime64[s]')
+            else:
+                arrays[f'{dim}_categories'] = np.array(categorical.categories.astype(str), dtype=str)
+        for measure in MEASURES:
+            arrays[measure] = self.cube[measure].to_numpy()
+
+        # np.savez_compressed appends .npz to the file name if missing, write to an open file instead
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: a file written by save
+        :return: a JobsCube
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            jobs_cube = cls(salary_column=str(arrays['salary_column']))
+            jobs_cube.job_ids = np.cumsum(arrays['job_ids_diff'])
+            cube = {}
+            for dim in DIMENSIONS:
+                categories = arrays[f'{dim}_categories']
+                if dim == 'listing_day':
+                    categories = pd.DatetimeIndex(categories.astype('datetime64[ns]'))
+                cube[dim] = pd.Categorical.from_codes(arrays[f'{dim}_codes'], categories=categories)
+            for measure in MEASURES:
+                cube[measure] = arrays[measure]
+        jobs_cube.cube = pd.DataFrame(cube)
+
+        return jobs_cube
@@ -0,0 +1,316 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from ..downloader.sites import location_site
+
+# naming convention:
+# level: suburb, area, location, state, country, from the most to the least specific
+# node: a place at a level, keyed by its SEEK id for suburb, area and location, by its name for state and country
+
+LEVELS = ['suburb', 'area', 'location', 'state', 'country']
+# the levels with a SEEK id column in the jobs dataframes, e.g. suburb_id
+ID_LEVELS = ['suburb', 'area', 'location']
+# the country of each site
+SITE_COUNTRIES = {'AU': 'Australia', 'NZ': 'New Zealand'}
+# the mean radius of the Earth
+EARTH_RADIUS_KM = 6371.0088
+# the bundled centroids of the SEEK locations, the main areas and suburbs
+CENTROIDS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'centroids.csv')
+
+# the Australian state at the end of a where value, e.g. 'All Sydney NSW', 'Parramatta NSW 2150'
+_STATE = re.compile(r'\b(NSW|VIC|QLD|SA|WA|TAS|NT|ACT)\b(?:\s+\d{4})?\s*$')
+
+
+# define a function to convert latitudes and longitudes in degrees to points on the unit sphere
+def _unit_vectors(latitude, longitude):
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return np.column_stack([np.cos(latitude) * np.cos(longitude), np.cos(latitude) * np.sin(longitude),
+                            np.sin(latitude)])
+
+
+# define the LocationIndex class: the hierarchy of the SEEK locations
+class LocationIndex:
+    """
+    The hierarchy suburb -> area -> location -> state -> country of the crawled jobs. Every node stores all its
+    ancestors, so a rollup is one dictionary lookup per job. With centroids (the bundled table or your own), the
+    nodes are indexed in a k-d tree for radius queries, e.g. the jobs within 30 km of Parramatta.
+
+    Example:
+        index = LocationIndex()
+        index.update(jobs.jobs_df)
+        index.set_centroids()
+        index.rollup(df_dict['jobs_wide'], level='state')
+        df_dict['jobs_wide'][index.jobs_within(df_dict['jobs_wide'], 'Parramatta', 30)]
+        index.save('data/locations.json')
+    """
+
+    def __init__(self):
+        # the nodes by level and key: name and the keys of the ancestors, e.g. nodes['suburb'][20001] =
+        # {'name': 'Parramatta', 'area': 5070, 'location': 1000, 'state': 'NSW', 'country': 'Australia'}
+        self.nodes = {level: {} for level in LEVELS}
+        # the centroids by level and key: (latitude, longitude)
+        self.coordinates = {level: {} for level in LEVELS}
+        # the centroid table by (level, name, location name), lower case, see set_centroids
+        self._centroids = None
+        self._tree = None
+
+    def __len__(self):
+        return sum(len(nodes) for nodes in self.nodes.values())
+
+    # define a function to add a node, the known ancestors of an existing node are kept
+    def _add(self, level, key, name, ancestors):
+        node = self.nodes[level].setdefault(key, {'name': name})
+        if name is not None:
+            node['name'] = name
+        for ancestor, value in ancestors.items():
+            if value is not None:
+                node[ancestor] = value
+
+    def update(self, jobs):
+        """
+        Add the places of a jobs dataframe to the hierarchy.
+
+        :param jobs: a jobs dataframe with location_id, and if available location, area_id, area, suburb_id, suburb,
+            the where values and site, e.g. Jobs.jobs_df or one of the chunks of Jobs.iter_download
+        :return: the number of nodes
+        """
+        if 'location_id' not in jobs.columns:
+            raise ValueError("jobs must have the location_id column")
+
+        # one row per place, there are much fewer places than jobs
+        columns = [col for col in ['suburb_id', 'suburb', 'area_id', 'area', 'location_id', 'location',
+                                   'suburb_where_value', 'location_where_value', 'site'] if col in jobs.columns]
+        places = jobs[columns].drop_duplicates()
+
+        for row in places.itertuples(index=False):
+            row = row._asdict()
+            ids = {level: row.get(f'{level}_id') for level in ID_LEVELS}
+            ids = {level: (int(value) if pd.notna(value) else None) for level, value in ids.items()}
+            if ids['location'] is None:
+                continue
+            names = {level: (row.get(level) if pd.notna(row.get(level)) else None) for level in ID_LEVELS}
+
+            # the state from the where values, the region of New Zealand is its location
+            state = None
+            for where_value in [row.get('location_where_value'), row.get('suburb_where_value')]:
+                match = _STATE.search(where_value) if isinstance(where_value, str) else None
+                if match:
+                    state = match.group(1)
+                    break
+            site = row.get('site')
+            if site not in SITE_COUNTRIES and names['location'] is not None:
+                site = 'AU' if state is not None else location_site(names['location'])
+            country = SITE_COUNTRIES.get(site)
+            if state is None and country == 'New Zealand':
+                state = names['location']
+
+            # add the nodes from the least specific one
+            if country is not None:
+                self._add('country', country, country, {})
+            if state is not None:
+                self._add('state', state, state, {'country': country})
+            self._add('location', ids['location'], names['location'], {'state': state, 'country': country})
+            if ids['area'] is not None:
+                self._add('area', ids['area'], names['area'],
+                          {'location': ids['location'], 'state': state, 'country': country})
+            if ids['suburb'] is not None:
+                self._add('suburb', ids['suburb'], names['suburb'],
+                          {'area': ids['area'], 'location': ids['location'], 'state': state, 'country': country})
+
+        # the new nodes may have a centroid
+        if self._centroids is not None:
+            self._match_centroids()
+
+        return len(self)
+
+    # define a function to get the key of the ancestor of a node at a level
+    def ancestor(self, level, key, to_level):
+        """
+        :param level: the level of the node, e.g. 'suburb'
+        :param key: the key of the node, e.g. 20001
+        :param to_level: the level of the ancestor, e.g. 'state'
+        :return: the key of the ancestor, None if unknown
+        """
+        node = self.nodes[level].get(key)
+        if node is None:
+            return None
+        return key if level == to_level else node.get(to_level)
+
+    def name(self, level, key):
+        """
+        :param level: the level of the node
+        :param key: the key of the node
+        :return: the name of the node, None if unknown
+        """
+        node = self.nodes[level].get(key)
+        return None if node is None else node['name']
+
+    def rollup(self, jobs, level='location'):
+        """
+        :param jobs: a jobs dataframe with suburb_id, area_id and/or location_id, e.g. jobs_wide
+        :param level: the level to roll up to, one of LEVELS
+        :return: a Series with the index of jobs, the name of each job's place at level, from its most specific id
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Invalid level: {level}, please choose from {LEVELS}")
+
+        result = pd.Series(None, index=jobs.index, dtype=object)
+        # from the most specific id, the jobs without a suburb roll up from their area, then from their location
+        for start in ID_LEVELS[:LEVELS.index(level) + 1]:
+            if f'{start}_id' not in jobs.columns:
+                continue
+            mapping = {}
+            for key in self.nodes[start]:
+                ancestor = self.ancestor(start, key, level)
+                if ancestor is not None:
+                    mapping[key] = self.name(level, ancestor)
+            missing = result.isna()
+            result[missing] = jobs.loc[missing, f'{start}_id'].map(mapping)
+
+        return result
+
+    def set_centroids(self, centroids=None):
+        """
+        :param centroids: a DataFrame or a csv file with the columns level, name, latitude and longitude, and
+            optionally location, the name of the location of an area or a suburb (area and suburb names repeat
+            across locations), default to the bundled CENTROIDS_FILE
+        :return: the number of nodes with a centroid
+        """
+        if centroids is None:
+            centroids = CENTROIDS_FILE
+        if isinstance(centroids, str):
+            centroids = pd.read_csv(centroids)
+        self._centroids = {}
+        for row in centroids.itertuples(index=False):
+            location = getattr(row, 'location', None)
+            location = location.lower() if isinstance(location, str) else ''
+            self._centroids[(row.level, row.name.lower(), location)] = (float(row.latitude), float(row.longitude))
+
+        return self._match_centroids()
+
+    # define a function to give the nodes the centroid of their name, and their location name for areas and suburbs
+    def _match_centroids(self):
+        for level in LEVELS:
+            for key, node in self.nodes[level].items():
+                if node['name'] is None:
+                    continue
+                location = self.name('location', node.get('location')) or ''
+                coordinates = self._centroids.get((level, node['name'].lower(), location.lower())) or \
+                    self._centroids.get((level, node['name'].lower(), ''))
+                if coordinates is not None:
+                    self.coordinates[level][key] = coordinates
+        self._tree = None
+
+        return sum(len(coordinates) for coordinates in self.coordinates.values())
+
+    # define a function to build the k-d tree of the nodes with a centroid, rebuilt when the centroids change
+    def _kd_tree(self):
+        if self._tree is None:
+            keys = [(level, key) for level in LEVELS for key in self.coordinates[level]]
+            points = np.array([self.coordinates[level][key] for level, key in keys], dtype=float).reshape(-1, 2)
+            # the tree is built on points of the unit sphere, so the euclidean distance is the chord distance
+            self._tree = (cKDTree(_unit_vectors(points[:, 0], points[:, 1])), keys)
+        return self._tree
+
+    # define a function to get the centroid of a place
+    def _centroid(self, place):
+        if isinstance(place, (tuple, list)):
+            return tuple(place)
+        for level in LEVELS:
+            for key, coordinates in self.coordinates[level].items():
+                if (self.name(level, key) or '').lower() == place.lower():
+                    return coordinates
+        # a place not crawled yet, e.g. a suburb without jobs
+        for (_, name, _), coordinates in (self._centroids or {}).items():
+            if name == place.lower():
+                return coordinates
+        raise ValueError(f"No centroid for {place}, please call set_centroids with a table including it")
+
+    def within(self, place, radius_km):
+        """
+        :param place: the name of a place, e.g. 'Parramatta', or a tuple of (latitude, longitude)
+        :param radius_km: the radius in kilometers
+        :return: a DataFrame of the level, key, name and distance_km of the nodes within radius_km of place, sorted
+            by distance
+        """
+        tree, keys = self._kd_tree()
+        latitude, longitude = self._centroid(place)
+        center = _unit_vectors(latitude, longitude)[0]
+        # the chord of the great circle arc of radius_km
+        chord = 2 * np.sin(min(radius_km / EARTH_RADIUS_KM, np.pi) / 2)
+        positions = tree.query_ball_point(center, chord)
+
+        chords = np.linalg.norm(tree.data[positions] - center, axis=1) if positions else np.array([])
+        result = pd.DataFrame({
+            'level': [keys[i][0] for i in positions],
+            'key': [keys[i][1] for i in positions],
+            'name': [self.name(*keys[i]) for i in positions],
+            'distance_km': 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chords / 2, 0, 1)),
+        })
+        return result.sort_values('distance_km', kind='stable').reset_index(drop=True)
+
+    def jobs_within(self, jobs, place, radius_km):
+        """
+        :param jobs: a jobs dataframe with suburb_id, area_id and/or location_id, e.g. jobs_wide
+        :param place: the name of a place, e.g. 'Parramatta', or a tuple of (latitude, longitude)
+        :param radius_km: the radius in kilometers
+        :return: a boolean Series with the index of jobs, True for the jobs whose most specific place with a
+            centroid is within radius_km of place
+        """
+        nodes = self.within(place, radius_km)
+        inside = {level: set(nodes.key[nodes.level == level]) for level in ID_LEVELS}
+
+        result = pd.Series(False, index=jobs.index)
+        located = pd.Series(False, index=jobs.index)
+        for level in ID_LEVELS:
+            if f'{level}_id' not in jobs.columns:
+                continue
+            ids = jobs[f'{level}_id']
+            # the jobs placed at this level: the most specific id with a centroid
+            placed = ~located & ids.isin(list(self.coordinates[level]))
+            result |= placed & ids.isin(list(inside[level]))
+            located |= placed
+
+        return result
+
+    def save(self, path):
+        """
+        Save the hierarchy, the centroids of the nodes and the centroid table as json.
+
+        :param path: the json file to write, e.g. data/locations.json
+        """
+        with open(path, 'w') as f:
+            json.dump({'nodes': {level: {str(key): node for key, node in nodes.items()}
+                                 for level, nodes in self.nodes.items()},
+                       'coordinates': {level: {str(key): list(value) for key, value in coordinates.items()}
+                                       for level, coordinates in self.coordinates.items()},
+                       # the centroid table matches the places of the next crawls
+                       'centroids': None if self._centroids is None else
+                       [list(key) + list(value) for key, value in self._centroids.items()]}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: a file written by save
+        :return: a LocationIndex
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        # the json keys are strings, the SEEK ids are integers
+        def key(level, value):
+            return int(value) if level in ID_LEVELS else value
+
+        index = cls()
+        index.nodes = {level: {key(level, k): node for k, node in data['nodes'][level].items()} for level in LEVELS}
+        index.coordinates = {level: {key(level, k): tuple(value) for k, value in data['coordinates'][level].items()}
+                             for level in LEVELS}
+        if data.get('centroids') is not None:
+            index._centroids = {(level, name, location): (latitude, longitude)
+                                for level, name, location, latitude, longitude in data['centroids']}
+        return index
@@ -0,0 +1,259 @@
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# naming convention:
+# term: a lower cased word of the title, teaser or job ad, e.g. 'python', 'c++'
+# counts: the sparse matrix of term counts, one row per job and one column per term of the vocabulary
+# weights: the tf-idf matrix computed from the counts, one unit row per job, so a dot product is a cosine similarity
+
+# the text columns of the jobs dataframes indexed, the missing ones are ignored
+TEXT_COLUMNS = ('title', 'teaser', 'job_ad_text')
+
+# the terms: words with an optional trailing + or #, e.g. c++, c#
+_TERM = re.compile(r'[a-z0-9]+[+#]*')
+# the frequent English words, they carry no similarity
+STOP_WORDS = frozenset("""
+a about above after all also am an and any are as at be been being both but by can could did do does doing down
+during each few for from further had has have having he her here hers him his how i if in into is it its itself just
+me more most my no nor not now of off on once only or other our ours out over own same she should so some such than
+that the their theirs them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours
+""".split())
+
+
+# define a function to split a text into terms
+def tokenize(text):
+    """
+    :param text: a text, or a missing value
+    :return: the list of the terms of the text, without the stop words
+    """
+    if not isinstance(text, str):
+        return []
+    return [term for term in _TERM.findall(text.lower()) if term not in STOP_WORDS]
+
+
+# define the SimilarityIndex class: a tf-idf vector space of the crawled jobs
+class SimilarityIndex:
+    """
+    The jobs as tf-idf vectors of the terms of their title, teaser and, when the details are downloaded, job ad text.
+    The term counts are kept in a sparse matrix, the idf and the unit tf-idf rows are computed from them when the
+    index changes, so jobs can be added and removed crawl after crawl. similar is a sparse matrix product of one
+    row with the transposed matrix, which only reads the jobs sharing a term with the row.
+
+    Example:
+        index = SimilarityIndex()
+        index.add(df_dict)
+        index.similar(job_id, k=10)
+        index.search('power bi developer', k=10)
+        index.save('data/similarity.npz')
+    """
+
+    def __init__(self, columns=TEXT_COLUMNS):
+        """
+        :param columns: the text columns indexed, default to TEXT_COLUMNS
+        """
+        self.columns = tuple(columns)
+        # the terms of the vocabulary in order of their column, and the column of each term
+        self.terms = []
+        self.vocabulary = {}
+        # the job id of each row, and the row of each job id
+        self.job_ids = np.array([], dtype=np.int64)
+        self._rows = {}
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int32)
+        # the number of jobs with each term
+        self.document_frequency = np.array([], dtype=np.int64)
+        # the tf-idf matrix and its transpose, one row per term like an inverted index, computed again after a change
+        self._weights = None
+        self._postings = None
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def __contains__(self, job_id):
+        return int(job_id) in self._rows
+
+    # define a function to get the id column and the jobs dataframe of the input of add and remove
+    @staticmethod
+    def _jobs(jobs):
+        if isinstance(jobs, dict):
+            jobs = jobs['jobs_wide']
+        id_column = 'job_id' if 'job_id' in jobs.columns else 'id'
+        return jobs, id_column
+
+    # define a function to count the terms of texts, the new terms are added to the vocabulary
+    def _count(self, texts):
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                col = self.vocabulary.get(term)
+                if col is None:
+                    col = self.vocabulary[term] = len(self.terms)
+                    self.terms.append(term)
+                rows.append(row)
+                cols.append(col)
+
+        # the duplicated entries are summed into counts
+        counts = sparse.coo_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(texts), len(self.terms))).tocsr()
+        counts.sum_duplicates()
+        return counts
+
+    # define a function to keep some rows of the index
+    def _keep(self, keep):
+        removed = self.counts[~keep]
+        self.document_frequency -= np.bincount(removed.indices, minlength=len(self.terms))
+        self.counts = self.counts[keep]
+        self.job_ids = self.job_ids[keep]
+        self._rows = {job_id: row for row, job_id in enumerate(self.job_ids.tolist())}
+        self._weights = None
+
+    def add(self, jobs):
+        """
+        Add a new crawl batch to the index, the jobs already indexed are replaced, e.g. once their details are
+        downloaded.
+
+        :param jobs: the dictionary returned by Jobs.get_all_dfs, or a jobs dataframe with job_id or id
+        :return: the number of jobs added or replaced
+        """
+        if jobs is None:
+            return 0
+        jobs, id_column = self._jobs(jobs)
+        if len(jobs) == 0:
+            return 0
+
+        # one document per job, the last one of the duplicates within the batch
+        jobs = jobs.drop_duplicates(subset=[id_column], keep='last')
+        ids = jobs[id_column].astype(np.int64).to_numpy()
+        columns = [col for col in self.columns if col in jobs.columns]
+        texts = [' '.join(text for text in row if isinstance(text, str))
+                 for row in jobs[columns].itertuples(index=False)]
+
+        # drop the old rows of the jobs replaced
+        replaced = np.isin(self.job_ids, ids)
+        if replaced.any():
+            self._keep(~replaced)
+
+        # append the new rows, the matrix gets the columns of the new terms
+        counts = self._count(texts)
+        self.counts.resize((self.counts.shape[0], len(self.terms)))
+        self.counts = sparse.vstack([self.counts, counts], format='csr', dtype=np.int32)
+        self.document_frequency = np.concatenate([
+            self.document_frequency, np.zeros(len(self.terms) - len(self.document_frequency), dtype=np.int64)])
+        self.document_frequency += np.bincount(counts.indices, minlength=len(self.terms))
+        self.job_ids = np.concatenate([self.job_ids, ids])
+        start = len(self.job_ids) - len(ids)
+        self._rows.update({job_id: row for row, job_id in enumerate(ids.tolist(), start=start)})
+        self._weights = None
+
+        return len(ids)
+
+    def remove(self, job_ids):
+        """
+        :param job_ids: the ids of the jobs to remove, e.g. the expired jobs
+        :return: the number of jobs removed
+        """
+        remove = np.isin(self.job_ids, np.asarray(list(job_ids), dtype=np.int64))
+        if remove.any():
+            self._keep(~remove)
+        return int(remove.sum())
+
+    # define a function to get the idf of the terms, smoothed like a document with every term
+    def _idf(self):
+        return (np.log((1 + len(self)) / (1 + self.document_frequency)) + 1).astype(np.float32)
+
+    # define a function to weight term counts by sublinear tf and idf and scale the rows to unit length
+    def _weigh(self, counts):
+        weights = counts.astype(np.float32)
+        weights.data = (1 + np.log(weights.data)) * self._idf()[weights.indices]
+        norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+        # the jobs without text keep an empty row
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(weights).tocsr()
+
+    # define a function to get the tf-idf matrix and its transpose, computed once after each change
+    def _matrix(self):
+        if self._weights is None:
+            self._weights = self._weigh(self.counts)
+            self._postings = self._weights.T.tocsr()
+        return self._weights, self._postings
+
+    # define a function to get the similarities of a unit tf-idf row with every job
+    def _scores(self, row):
+        # the product only reads the rows of the transpose of the terms of row
+        return row.dot(self._matrix()[1]).toarray().ravel()
+
+    # define a function to get the k best scores of a row of similarities
+    def _top(self, scores, k, exclude=None):
+        if exclude is not None:
+            scores[exclude] = -1
+        k = min(k, len(scores))
+        if k == 0:
+            return pd.DataFrame({'job_id': np.array([], dtype=np.int64), 'similarity': np.array([], dtype=float)})
+        top = np.argpartition(-scores, k - 1)[:k]
+        # the best first, ties by row, and only the jobs sharing a term
+        top = top[np.lexsort((top, -scores[top]))]
+        top = top[scores[top] > 0]
+        return pd.DataFrame({'job_id': self.job_ids[top], 'similarity': scores[top].astype(float)})
+
+    def similar(self, job_id, k=10):
+        """
+        :param job_id: the id of an indexed job
+        :param k: the number of jobs returned
+        :return: a DataFrame of job_id and similarity (cosine of the tf-idf vectors, from 0 to 1) of the k jobs most
+            similar to job_id, the most similar first, the job itself and the jobs sharing no term are not included
+        """
+        row = self._rows.get(int(job_id))
+        if row is None:
+            raise KeyError(f"Job {job_id} is not in the index")
+        scores = self._scores(self._matrix()[0][row])
+        return self._top(scores, k, exclude=row)
+
+    def search(self, text, k=10):
+        """
+        :param text: a free text, e.g. 'power bi developer'
+        :param k: the number of jobs returned
+        :return: a DataFrame of job_id and similarity of the k jobs most similar to text, the most similar first
+        """
+        # the terms not in the vocabulary are in no job
+        cols = [self.vocabulary[term] for term in tokenize(text) if term in self.vocabulary]
+        counts = sparse.csr_matrix((np.ones(len(cols), dtype=np.int32), (np.zeros(len(cols), dtype=np.int64), cols)),
+                                   shape=(1, len(self.terms)))
+        counts.sum_duplicates()
+        scores = self._scores(self._weigh(counts))
+        return self._top(scores, k)
+
+    def save(self, path):
+        """
+        Save the index as a compressed numpy archive: the term counts as a sparse matrix, the job ids and the
+        vocabulary.
+
+        :param path: the file to write, e.g. data/similarity.npz
+        """
+        arrays = {'data': self.counts.data, 'indices': self.counts.indices, 'indptr': self.counts.indptr,
+                  'shape': np.array(self.counts.shape), 'job_ids': self.job_ids,
+                  'terms': np.array(self.terms, dtype=str), 'columns': np.array(self.columns, dtype=str)}
+
+        # np.savez_compressed appends .npz to the file name if missing, write to an open file instead
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: a file written by save
+        :return: a SimilarityIndex
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            index = cls(columns=arrays['columns'].tolist())
+            index.counts = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                             shape=tuple(arrays['shape']))
+            index.job_ids = arrays['job_ids']
+            index.terms = arrays['terms'].tolist()
+        index.vocabulary = {term: col for col, term in enumerate(index.terms)}
+        index._rows = {job_id: row for row, job_id in enumerate(index.job_ids.tolist())}
+        index.document_frequency = np.bincount(index.counts.indices, minlength=len(index.terms)).astype(np.int64)
+
+        return index
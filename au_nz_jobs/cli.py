@@ -0,0 +1,205 @@
+"""Console script for au_nz_jobs.
+
+Only the standard library is imported at module level. pandas, numpy and requests are imported inside the
+sub-command handlers, so `au-nz-jobs --help`, `--version` and argument errors return in milliseconds.
+"""
+import argparse
+import contextlib
+import sys
+
+# work_type options accepted by Jobs
+WORK_TYPE_OPTIONS = ['full_time', 'part_time', 'contract', 'casual']
+# sort_mode options accepted by Jobs.download
+SORT_MODE_OPTIONS = ['relevance', 'date']
+# format options accepted by save_jobs
+FORMAT_OPTIONS = ['csv', 'excel']
+# engine options accepted by Jobs, see downloader.engine.ENGINES
+ENGINE_OPTIONS = ['pandas', 'polars', 'duckdb']
+
+
+# define a function to add the search arguments shared by crawl and save
+def _add_search_arguments(parser):
+    parser.add_argument('-k', '--keywords', nargs='+', required=True, help='keywords to search')
+    parser.add_argument('-l', '--locations', nargs='+', required=True,
+                        help='locations to search, New Zealand locations are searched on the NZ site')
+    parser.add_argument('-w', '--work-type', nargs='+', choices=WORK_TYPE_OPTIONS, default=None,
+                        help='work types to search, all work types by default')
+    parser.add_argument('-d', '--date-range', type=int, default=31,
+                        help='number of days back from today to search, default to 31')
+    parser.add_argument('-s', '--sort-mode', choices=SORT_MODE_OPTIONS, default='date',
+                        help='sort mode, default to date')
+
+
+# define a function to build the argument parser
+def build_parser():
+    """
+    :return: the argument parser of the au-nz-jobs command
+    """
+    # import the version only, importing au_nz_jobs does not import pandas
+    from au_nz_jobs import __version__
+
+    parser = argparse.ArgumentParser(
+        prog='au-nz-jobs',
+        description='Download and save jobs in Australia and New Zealand from SEEK.')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    # crawl: search jobs and write the cleaned search results as csv
+    crawl = subparsers.add_parser('crawl', help='search jobs and write the cleaned search results as csv')
+    _add_search_arguments(crawl)
+    crawl.add_argument('-o', '--output', default='-', help='output csv file, default to stdout')
+    crawl.set_defaults(handler=_crawl)
+
+    # details: download the details of given job ids and write them as json lines
+    details = subparsers.add_parser('details', help='download job details as json lines')
+    details.add_argument('job_ids', nargs='*', default=['-'],
+                         help='job ids to download, "-" (default) reads one job id per line from stdin')
+    details.add_argument('-o', '--output', default='-', help='output json lines file, default to stdout')
+    details.set_defaults(handler=_details)
+
+    # save: run the whole pipeline and save the dataframes with save_jobs
+    save = subparsers.add_parser('save', help='search jobs, download details and save all tables')
+    _add_search_arguments(save)
+    save.add_argument('-c', '--check-words', nargs='+', default=None,
+                      help='words to filter out the irrelevant jobs before downloading details')
+    save.add_argument('--no-details', action='store_true', help='do not download the job details')
+    save.add_argument('--max-details', type=int, default=None,
+                      help='maximum number of job details to download, the most valuable first')
+    save.add_argument('--details-deadline', type=float, default=None, metavar='SECONDS',
+                      help='stop downloading job details after SECONDS, the jobs left are saved without details')
+    save.add_argument('--known-advertisers', metavar='FILE', default=None,
+                      help='advertiser ids seen before, their jobs are downloaded last: one id per line, or a csv with '
+                           'an advertiser_id column, e.g. the advertiser.csv of an earlier save --relational')
+    save.add_argument('-f', '--format', choices=FORMAT_OPTIONS, default='csv', help='output format, default to csv')
+    save.add_argument('--relational', action='store_true',
+                      help='save the relational tables instead of the single jobs_wide table')
+    save.add_argument('-p', '--path', default='data', help='output directory, default to data')
+    save.add_argument('-e', '--engine', choices=ENGINE_OPTIONS, default='pandas',
+                      help='engine of the distinct rows, check_words and merges, default to pandas')
+    save.add_argument('--profile', metavar='DIR', default=None,
+                      help='profile each stage and write the report and flamegraph stacks to DIR')
+    save.set_defaults(handler=_save)
+
+    return parser
+
+
+# define a function to open the output, "-" means stdout
+def _open_output(output):
+    if output == '-':
+        return sys.stdout
+    return open(output, 'w', newline='', encoding='utf-8')
+
+
+# define a function to read the job ids from the arguments and stdin
+def _read_job_ids(job_ids):
+    for job_id in job_ids:
+        if job_id == '-':
+            # read one job id per line from stdin, skip the blank lines
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield job_id
+
+
+# define a function to read the known advertiser ids from a text file or a csv with an advertiser_id column
+def _read_known_advertisers(file_name):
+    import csv
+
+    with open(file_name, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.reader(f) if row]
+    # a csv with a header, read the advertiser_id column, otherwise one id per line
+    if rows and 'advertiser_id' in rows[0]:
+        column = rows[0].index('advertiser_id')
+        return {row[column].strip() for row in rows[1:] if len(row) > column and row[column].strip()}
+    return {row[0].strip() for row in rows if row[0].strip()}
+
+
+# define the handler of the crawl command
+def _crawl(args):
+    from au_nz_jobs.downloader import Jobs
+    from au_nz_jobs.save_jobs import JobsWriter
+
+    # search the jobs
+    jobs = Jobs(args.keywords, args.locations, work_type=args.work_type)
+
+    # write the cleaned search results chunk by chunk, one chunk per pair of keyword and location, to stdout as is,
+    # or to a .part file renamed to the output file once the crawl is finished
+    output = sys.stdout if args.output == '-' else args.output
+    # the progress messages of the search go to stderr, so stdout only carries the csv
+    with contextlib.redirect_stdout(sys.stderr):
+        with JobsWriter(outputs={'jobs': output}) as writer:
+            for chunk in jobs.iter_download(date_range=args.date_range, sort_mode=args.sort_mode):
+                writer.write('jobs', chunk, key='id')
+
+    return 0
+
+
+# define the handler of the details command
+def _details(args):
+    import json
+    from au_nz_jobs.downloader import Job
+
+    # download the details one by one and flush each line, so the command can be used in a pipeline
+    output = _open_output(args.output)
+    try:
+        for job_id in _read_job_ids(args.job_ids):
+            job_details = Job(job_id=job_id).download()
+            output.write(json.dumps(job_details, default=str) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 0
+
+
+# define the handler of the save command
+def _save(args):
+    from au_nz_jobs.downloader import Jobs
+    from au_nz_jobs.save_jobs import save_jobs
+
+    # profile the stages if asked
+    profiler = None
+    if args.profile is not None:
+        from au_nz_jobs.profiler import StageProfiler
+        profiler = StageProfiler()
+
+    # run the whole pipeline
+    jobs = Jobs(args.keywords, args.locations, work_type=args.work_type, profiler=profiler, engine=args.engine)
+    df_dict = jobs.get_all_dfs(date_range=args.date_range, sort_mode=args.sort_mode, check_words=args.check_words,
+                               if_download_details=not args.no_details, max_details=args.max_details,
+                               details_deadline=args.details_deadline,
+                               known_advertisers=None if args.known_advertisers is None else
+                               _read_known_advertisers(args.known_advertisers))
+
+    # get_all_dfs returns None when no job is found
+    if df_dict is None:
+        print("No jobs found, nothing to save.", file=sys.stderr)
+        return 1
+
+    # save the dataframes
+    save_jobs(df_dict, format=args.format, single_table=not args.relational, path=args.path, profiler=profiler)
+
+    # write the profile report
+    if profiler is not None:
+        profiler.write_report(args.profile)
+        print(f"Profile written to {args.profile}", file=sys.stderr)
+
+    return 0
+
+
+def main(argv=None):
+    """Console script for au_nz_jobs.
+
+    :param argv: list of arguments, default to sys.argv[1:]
+    :return: exit code
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())  # pragma: no cover
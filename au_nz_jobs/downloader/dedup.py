@@ -0,0 +1,159 @@
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# odd 64 bits constants mixing the word hashes of a shingle into a single hash
+_MIXERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x85EBCA77C2B2AE63,
+                    0x27D4EB2F165667C5], dtype=np.uint64)
+
+# precompiled patterns to normalize the text before shingling
+_TAG = re.compile(r'<[^>]+>')
+_ENTITY = re.compile(r'&[a-z]+;|&#\d+;')
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+# define a function to get the shingle hashes of a text
+def shingle_hashes(text, shingle_size=3, word_hashes=None):
+    """
+    :param text: a text, html tags are ignored
+    :param shingle_size: number of words in a shingle, at most 5
+    :param word_hashes: a dictionary caching the hash of each word, shared across texts
+    :return: a numpy array of the distinct 32 bits hashes of the word shingles
+    """
+    word_hashes = {} if word_hashes is None else word_hashes
+    words = _WORD.findall(_ENTITY.sub(' ', _TAG.sub(' ', text.lower())))
+
+    # hash each word once, crc32 is stable across processes, unlike hash()
+    hashes = np.array([word_hashes.get(w) or word_hashes.setdefault(w, zlib.crc32(w.encode()) + 1) for w in words],
+                      dtype=np.uint64)
+    # a text shorter than a shingle is a single shingle, an empty text has no shingle
+    if len(hashes) < shingle_size:
+        hashes = np.concatenate([hashes, np.zeros(shingle_size - len(hashes), dtype=np.uint64)])
+
+    # mix the hashes of the consecutive words of each shingle, the overflow is intended
+    n = len(hashes) - shingle_size + 1
+    shingles = hashes[:n] * _MIXERS[0]
+    for j in range(1, shingle_size):
+        shingles ^= hashes[j:n + j] * _MIXERS[j]
+
+    return np.unique(shingles >> np.uint64(32))
+
+
+def minhash_signatures(texts, num_perm=128, shingle_size=3, seed=0, chunk_size=200):
+    """
+    Compute the MinHash signature of each text: for every random hash function applied to the shingle hashes, the
+    smallest value. Two texts agree on a signature position with probability close to their Jaccard similarity.
+
+    :param texts: an iterable of texts
+    :param num_perm: number of hash functions, the length of a signature
+    :param shingle_size: number of words in a shingle, at most 5
+    :param seed: random seed of the hash functions
+    :param chunk_size: number of texts hashed at a time, bounds the memory of the hashed shingles
+    :return: a numpy array of shape (number of texts, num_perm)
+    """
+    # multiply-shift hash functions: the upper 32 bits of (a * x + b) mod 2^64, with a odd
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=(num_perm, 1), dtype=np.uint64)
+
+    word_hashes = {}
+    hashes = [shingle_hashes(text, shingle_size, word_hashes) for text in texts]
+    signatures = np.empty((num_perm, len(hashes)), dtype=np.uint32)
+
+    # hash the shingles of a chunk of texts at once, then take the minimum per text
+    for start in range(0, len(hashes), chunk_size):
+        chunk = hashes[start:start + chunk_size]
+        offsets = np.cumsum([0] + [len(h) for h in chunk[:-1]])
+        hashed = a * np.concatenate(chunk)
+        hashed += b
+        hashed >>= np.uint64(32)
+        signatures[:, start:start + len(chunk)] = np.minimum.reduceat(hashed, offsets, axis=1)
+
+    return np.ascontiguousarray(signatures.T)
+
+
+# define a function to find the root of a node in the union-find forest, with path halving
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def lsh_clusters(signatures, bands=16, threshold=0.8):
+    """
+    Cluster the signatures with locality-sensitive hashing: the signatures are cut into bands, texts sharing a whole
+    band land in the same bucket and become candidates, only the candidates are compared. Candidates with an
+    estimated Jaccard similarity of at least threshold are merged.
+
+    :param signatures: the output of minhash_signatures
+    :param bands: number of bands, must divide the signature length
+    :param threshold: minimum estimated Jaccard similarity of near duplicates
+    :return: a numpy array with the position of the representative (the first member) of each text's cluster
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands != 0:
+        raise ValueError(f"bands: {bands} must divide the signature length: {num_perm}")
+    rows = num_perm // bands
+
+    # collect the candidate pairs: every member of a bucket is paired with the first member of the bucket
+    multipliers = np.random.default_rng(0).integers(1, 2 ** 63, size=rows, dtype=np.uint64)
+    left, right = [], []
+    for band in range(bands):
+        # hash each band to a single integer, the overflow is intended
+        keys = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * multipliers).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        # position of the first member of each member's bucket
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        first = order[starts[np.searchsorted(starts, np.arange(n), side='right') - 1]]
+        members = first != order
+        left.append(first[members])
+        right.append(order[members])
+
+    parent = list(range(n))
+    if left:
+        left, right = np.concatenate(left), np.concatenate(right)
+        # drop the pairs found by several bands, then verify the candidates on the whole signature
+        pairs = np.unique(np.stack([left, right], axis=1), axis=0)
+        similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        for i, j in pairs[similarity >= threshold]:
+            root_i, root_j = _find(parent, int(i)), _find(parent, int(j))
+            # the smaller position becomes the root, so the representative is the first member
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+def cluster_jobs(df, columns=('title', 'teaser', 'job_ad_details'), id_column='id', threshold=0.8, num_perm=128,
+                 bands=16, shingle_size=3):
+    """
+    :param df: jobs dataframe
+    :param columns: the text columns to compare, the missing columns are ignored
+    :param id_column: the job id column
+    :param threshold: minimum estimated Jaccard similarity of near duplicates, default to 0.8
+    :param num_perm: number of MinHash permutations
+    :param bands: number of LSH bands, must divide num_perm
+    :param shingle_size: number of words in a shingle
+    :return: a Series with the index of df, the id of the first job of each job's cluster
+    """
+    if len(df) == 0:
+        return pd.Series(index=df.index, dtype=df[id_column].dtype, name='cluster_id')
+
+    # join the text columns
+    columns = [col for col in columns if col in df.columns]
+    text = df[columns[0]].fillna('').astype(str)
+    for col in columns[1:]:
+        text = text + ' ' + df[col].fillna('').astype(str)
+
+    # cluster the jobs, then map the position of the representative to its id
+    representatives = lsh_clusters(minhash_signatures(text.tolist(), num_perm=num_perm, shingle_size=shingle_size),
+                                   bands=bands, threshold=threshold)
+    # jobs without any text are not duplicates of each other
+    empty = (text.str.strip() == '').to_numpy()
+    representatives[empty] = np.flatnonzero(empty)
+
+    return pd.Series(df[id_column].to_numpy()[representatives], index=df.index, name='cluster_id')
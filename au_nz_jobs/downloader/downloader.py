@@ -4,11 +4,40 @@ import pandas as pd
 import numpy as np
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..profiler import profile_stage
+from .dedup import cluster_jobs
+from .engine import get_engine
+from .fetch_queue import DetailQueue
+from .salary import normalize_salary
+from .sites import SITES, location_site, site_session
+from .stages import StageGraph, stage
+from .text import process_details, term_stats
 
 
 # naming convention:
 # variables and fields in df and database: snake_case
 
+# the columns of the job details, see Job.download
+DETAIL_COLUMNS = ["id", "expiry_date", "salary_type", "has_role_requirements", "role_requirements", "job_ad_details",
+                  "email", "phone", "company_overall_rating", "company_profile_url", "company_name_review",
+                  "company_id"]
+
+# with copy on write, always on from pandas 3, a shallow copy can not change the frame it was copied from
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+# define a function to copy a memoized dataframe before returning it, so the caller can change the copy in place
+def _copy_frame(df):
+    return df.copy(deep=not _COPY_ON_WRITE)
+
+
+# define a function to publish a stage of Jobs as a read-only property returning a copy of its result
+def _stage_property(name):
+    return property(lambda self: _copy_frame(getattr(self, name)()),
+                    doc=f"a copy of the result of {name}, computed on first use")
+
 
 # define the Job class: detailed information of a certain job
 class Job:
@@ -22,12 +51,17 @@ class Job:
         self.job_id = job_id
 
     # define a function to download the job information
-    def download(self):
+    def download(self, timeout=None):
+        """
+        :param timeout: number of seconds to wait for the server, see requests.get, default to None which means no
+            timeout, requests.exceptions.Timeout is raised when it is reached
+        :return: the dictionary of the job details
+        """
         # initiate the url
         url = f"{self.SEEK_API_URL_JOB}/{self.job_id}"
 
         # api request
-        r = requests.get(url=url)
+        r = requests.get(url=url, timeout=timeout)
 
         # convert to json
         r = r.json()
@@ -112,19 +146,57 @@ class Jobs:
     SEEK_API_URL = "https://www.seek.com.au/api/chalice-search/search"
     SEEK_API_URL_JOB = "https://chalice-experience-api.cloud.seek.com.au/job"
 
-    def __init__(self, keywords: list, locations: list, work_type: list = None, check_words: list = None):
+    def __init__(self, keywords: list, locations, work_type: list = None, check_words: list = None,
+                 profiler=None, sites: dict = None, engine='pandas'):
         """
         :param keywords: list of keywords to search
-        :param locations: list of locations to search
+        :param locations: list of locations to search, each one is searched on the site of its country (see
+            sites.location_site), or a dictionary of site to list of locations, e.g. {'NZ': ['Auckland'],
+            'AU': ['Sydney']}
         :param work_type: list of work type to search, default to None which means all work types
             options: ['full_time', 'part_time', 'contract', 'casual']
+        :param profiler: a profiler.StageProfiler recording the time and memory of each stage, default to None
+        :param sites: settings overriding sites.SITES by site, e.g. {'NZ': {'max_workers': 2}}, default to None
+        :param engine: the engine of the distinct rows, check_words and merges, see engine.ENGINES, default to
+            'pandas', 'polars' and 'duckdb' need the optional dependency of the same name
         """
         self.keywords = keywords
         self.locations = locations
         self.work_type = work_type
         self.check_words = check_words
-        self.if_downloaded = False
-        self.if_download_details = False
+        self.profiler = profiler
+        self.engine = get_engine(engine)
+
+        # merge the site settings
+        self.sites = {site: dict(config) for site, config in SITES.items()}
+        for site, config in (sites or {}).items():
+            self.sites[site] = {**self.sites.get(site, {}), **config}
+
+        # check the sites of the locations
+        self.site_locations
+
+        # the settings read by the stages, set by download and get_all_dfs
+        self.date_range = 31
+        self.sort_mode = 'date'
+        self.if_download_details = True
+        self.skip_near_duplicates = False
+        self.near_duplicate_threshold = 0.8
+        self.check_words_in_details = True
+        self.skill_vocabulary = None
+        self.n_processes = None
+        self.details_deadline = None
+        self.max_details = None
+        self.known_advertisers = None
+
+        # the details downloaded so far by job id, reused when the jobs to download change, e.g. new check_words
+        self.job_details = {}
+        self.deferred_job_ids = []
+
+        # the stages of get_all_dfs, each one computed again only when its settings or upstream stages change
+        self.stages = StageGraph(self)
+
+        # one session per site, created on first use, so the connections are reused across the searches
+        self._sessions = {}
 
         # work_type id dictionary
         self.work_type_dict = {
@@ -145,14 +217,49 @@ class Jobs:
         else:
             self.work_type_id = self.work_type_dict.values()
 
-    def download(self, date_range: int = 31, sort_mode: str = 'date'):
+    # define a property to route each location to its site
+    @property
+    def site_locations(self):
         """
-        :param date_range: number of days back from today to search, default to 31
-        :param sort_mode: sort mode, default to 'date'
-            options: ['relevance', 'date']
-        :return: a list of jobs
+        :return: a list of (location, site) in order of self.locations
         """
-
+        if isinstance(self.locations, dict):
+            for site in self.locations:
+                if site not in self.sites:
+                    raise ValueError(f"Invalid site: {site}, please choose from {list(self.sites)}")
+            return [(location, site) for site, site_locations in self.locations.items()
+                    for location in site_locations]
+        return [(location, location_site(location)) for location in self.locations]
+
+    # define a property telling if the jobs of the current search are downloaded
+    @property
+    def if_downloaded(self):
+        return self.stages.is_valid('_search')
+
+    @if_downloaded.setter
+    def if_downloaded(self, value):
+        # set to False to download the jobs again on next use
+        if not value:
+            self.stages.invalidate('_search')
+
+    # define a property to get a copy of the downloaded jobs, downloaded on first use
+    @property
+    def jobs_df(self):
+        return _copy_frame(self._search())
+
+    # the intermediate dataframes of get_all_dfs, copies of the memoized stages
+    classification_df = _stage_property('_classification_df')
+    sub_classification_df = _stage_property('_sub_classification_df')
+    location_df = _stage_property('_location_df')
+    area_df = _stage_property('_area_df')
+    advertiser_df = _stage_property('_advertiser_df')
+    jobs_cleaned_df = _stage_property('_jobs_cleaned_df')
+    jobs_details_df = _stage_property('_download_details')
+    company_review_df = _stage_property('_company_review_df')
+
+    # define a function to convert sort_mode to the value used by the api
+    @staticmethod
+    def _sort_mode(sort_mode):
         # convert sort_mode
         sort_mode_dict = {
             'relevance': 'KeywordRelevance',
@@ -161,268 +268,362 @@ class Jobs:
         # check if the sort_mode is valid
         if sort_mode not in sort_mode_dict.keys():
             raise ValueError(f"Invalid sort_mode: {sort_mode}, please choose from {sort_mode_dict.keys()}")
-        sort_mode = sort_mode_dict[sort_mode]
+        return sort_mode_dict[sort_mode]
 
-        # define a function to download for a single pair of keyword and location
-        def _download_jobs(keyword, location):
-            # start timer
-            start_time = time.time()
+    # define a function to get the session of a site
+    def _session(self, site):
+        if site not in self._sessions:
+            self._sessions[site] = site_session(self.sites[site])
+        return self._sessions[site]
 
-            # initiate the parameters
-            params = dict(
-                siteKey="AU-Main",
-                sourcesystem="houston",
-                page="1",
-                seekSelectAllPages="true",
-                sortmode=sort_mode,
-                dateRange=date_range,
-                # unpack the work_type_id and join with comma
-                worktype=','.join([str(i) for i in self.work_type_id]),
-                keywords=keyword,
-                where=location
-            )
+    # define a function to download for a single pair of keyword and location
+    def _download_jobs(self, keyword, location, date_range, sort_mode, site='AU'):
+        """
+        :param keyword: keyword to search
+        :param location: location to search
+        :param date_range: number of days back from today to search
+        :param sort_mode: sort mode used by the api, e.g. 'ListedDate'
+        :param site: the site to search, a key of self.sites, default to 'AU'
+        :return: a list of raw jobs
+        """
+        # start timer
+        start_time = time.time()
 
-            # api request
-            resp = requests.get(url=self.SEEK_API_URL, params=params)
+        # get the endpoint and the session of the site
+        site_config = self.sites[site]
+        url = site_config['search_url']
+        session = self._session(site)
+
+        # initiate the parameters
+        params = dict(
+            siteKey=site_config['site_key'],
+            sourcesystem="houston",
+            page="1",
+            seekSelectAllPages="true",
+            sortmode=sort_mode,
+            dateRange=date_range,
+            # unpack the work_type_id and join with comma
+            worktype=','.join([str(i) for i in self.work_type_id]),
+            keywords=keyword,
+            where=location
+        )
 
-            # convert the response to json
-            json_resp = resp.json()
+        # api request
+        resp = session.get(url=url, params=params)
 
-            # get the total number job count
-            total_job_count = json_resp.get('totalCount')
-
-            # if total_job_count is 0, return empty list
-            if total_job_count == 0:
-                print(f"No jobs found for keyword: {keyword}, location: {location} in the last {date_range} days.")
-                print("You can try again with longer date range or different keywords/location.")
-                return []
-
-            # convert job count to number of pages
-            if total_job_count % 20 == 0:
-                pages = total_job_count // 20
-            else:
-                pages = total_job_count // 20 + 1
-
-            # initiate the jobs list
-            jobs = []
-
-            # loop through the pages
-            for page in range(1, pages + 1):
-                # update the page number
-                params['page'] = page
-                # api request
-                resp = requests.get(url=self.SEEK_API_URL, params=params)
-                # convert the response to json
-                json_resp = resp.json()
-                # get the jobs
-                jobs += json_resp.get('data')
-
-            # end timer
-            end_time = time.time()
-            print(
-                f"Downloaded {len(jobs)} jobs for keyword: {keyword}, location: {location} in {(end_time - start_time):.2f} seconds.")
-
-            # return the jobs
-            return jobs
+        # convert the response to json
+        json_resp = resp.json()
+
+        # get the total number job count
+        total_job_count = json_resp.get('totalCount')
+
+        # if total_job_count is 0, return empty list
+        if total_job_count == 0:
+            print(f"No jobs found for keyword: {keyword}, location: {location} in the last {date_range} days.")
+            print("You can try again with longer date range or different keywords/location.")
+            return []
+
+        # convert job count to number of pages
+        if total_job_count % 20 == 0:
+            pages = total_job_count // 20
+        else:
+            pages = total_job_count // 20 + 1
 
         # initiate the jobs list
         jobs = []
 
-        # loop through the keywords and locations
-        for keyword in self.keywords:
-            for location in self.locations:
-                # download the jobs
-                jobs += _download_jobs(keyword, location)
+        # loop through the pages
+        for page in range(1, pages + 1):
+            # update the page number
+            params['page'] = page
+            # api request
+            resp = session.get(url=url, params=params)
+            # convert the response to json
+            json_resp = resp.json()
+            # get the jobs
+            jobs += json_resp.get('data')
+
+        # end timer
+        end_time = time.time()
+        print(
+            f"Downloaded {len(jobs)} jobs for keyword: {keyword}, location: {location} ({site}) in {(end_time - start_time):.2f} seconds.")
+
+        # return the jobs
+        return jobs
+
+    # define a function to clean the jobs dataframe
+    @staticmethod
+    def _clean_jobs(df):
+        # drop the duplicate jobs based on id
+        df.drop_duplicates(subset=['id'], inplace=True)
+
+        # drop the unnecessary columns: logo, isStandOut, automaticInclusion, displayType, templateFileName,
+        # tracking, solMetadata, branding, categories
+        # ignore the missing ones, a single chunk of jobs does not always carry every optional column
+        df.drop(
+            columns=['logo', 'isStandOut', 'automaticInclusion', 'displayType', 'templateFileName', 'tracking',
+                     'solMetadata', 'branding', 'categories'], inplace=True, errors='ignore')
+
+        # drop the columns with names in numbers
+        df.drop(columns=[i for i in df.columns if i.isdigit()], inplace=True)
+
+        # rename all camel case columns to snake case
+        df.rename(columns={i: re.sub(r'(?<!^)(?=[A-Z])', '_', i).lower() for i in df.columns}, inplace=True)
+
+        # convert area_id, suburb_id to Int64, create them if no job in the chunk has an area or suburb
+        for col in ['area_id', 'suburb_id']:
+            if col not in df.columns:
+                df[col] = None
+            df[col] = df[col].astype('Int64')
+
+        # split the advertiser column, example: {'description': 'Seek Limited', 'id': '20242373'}
+        df['advertiser_title'] = df['advertiser'].apply(lambda x: x['description'])
+        df['advertiser_id'] = df['advertiser'].apply(lambda x: x['id'])
+        df.drop(columns=['advertiser'], inplace=True)
+        # rename the advertiser_title column to advertiser
+        df.rename(columns={'advertiser_title': 'advertiser'}, inplace=True)
+
+        # split the classification column, example: { 'id': '6304', 'description': 'Information & Communication
+        # Technology'}
+        df['classification_title'] = df['classification'].apply(lambda x: x['description'])
+        df['classification_id'] = df['classification'].apply(lambda x: x['id'])
+        df.drop(columns=['classification'], inplace=True)
+        # rename the classification_title column to classification
+        df.rename(columns={'classification_title': 'classification'}, inplace=True)
+
+        # split the sub_classification column, example: {'id': '6311', 'description': 'Database Development'}
+        df['sub_classification_title'] = df['sub_classification'].apply(lambda x: x['description'])
+        df['sub_classification_id'] = df['sub_classification'].apply(lambda x: x['id'])
+        df.drop(columns=['sub_classification'], inplace=True)
+        # rename the sub_classification_title column to sub_classification
+        df.rename(columns={'sub_classification_title': 'sub_classification'}, inplace=True)
+
+        # return the jobs dataframe
+        return df
+
+    def iter_download(self, date_range: int = 31, sort_mode: str = 'date'):
+        """
+        Download the jobs chunk by chunk, one chunk per pair of keyword and location. The sites are searched side by
+        side, each one by its own pool of max_workers threads, with at most max_workers searches of a site submitted
+        ahead of the chunk being yielded. Jobs already yielded by an earlier chunk are dropped, including the jobs
+        listed on both sites, so the chunks can be streamed to a JobsWriter without keeping the whole crawl in memory.
+
+        :param date_range: number of days back from today to search, default to 31
+        :param sort_mode: sort mode, default to 'date'
+            options: ['relevance', 'date']
+        :return: a generator of cleaned jobs dataframes, with the site column
+        """
+        sort_mode = self._sort_mode(sort_mode)
+
+        # the searches, in order of keyword and location
+        searches = [(keyword, location, site) for keyword in self.keywords for location, site in self.site_locations]
+
+        # one pool of threads per site, the sessions are created before the threads share them
+        executors = {}
+        for site in dict.fromkeys(site for _, _, site in searches):
+            self._session(site)
+            executors[site] = ThreadPoolExecutor(max_workers=self.sites[site]['max_workers'],
+                                                 thread_name_prefix=f'seek-{site}')
+
+        # the searches of each site not submitted yet, in order
+        pending = {site: [] for site in executors}
+        for i, (_, _, site) in enumerate(searches):
+            pending[site].append(i)
+        pending = {site: iter(indexes) for site, indexes in pending.items()}
+        # the future of each search, None once its result is taken, so its raw jobs can be freed
+        futures = [None] * len(searches)
+
+        # define a function to submit the next search of a site
+        def submit_next(site):
+            i = next(pending[site], None)
+            if i is not None:
+                keyword, location, _ = searches[i]
+                futures[i] = executors[site].submit(self._download_jobs, keyword, location, date_range, sort_mode,
+                                                    site)
+
+        # ids of the jobs already yielded
+        seen_ids = set()
+
+        try:
+            # fill the pool of each site
+            for site in executors:
+                for _ in range(self.sites[site]['max_workers']):
+                    submit_next(site)
+
+            # collect the searches in order, so the chunks do not depend on which site answers first
+            for i, (keyword, location, site) in enumerate(searches):
+                # wait for the jobs, the profiler only measures the wait, the search runs in another thread
+                with profile_stage(self.profiler, 'download_jobs'):
+                    jobs = futures[i].result()
+                futures[i] = None
+                # a search of the site is done, submit the next one
+                submit_next(site)
+
+                # drop the jobs found by an earlier pair, on either site
+                jobs = [job for job in jobs if job.get('id') not in seen_ids]
+                if len(jobs) == 0:
+                    continue
+                seen_ids.update(job.get('id') for job in jobs)
+
+                # convert the jobs to dataframe, clean and yield it, the stage ends before the yield
+                with profile_stage(self.profiler, 'clean_jobs'):
+                    jobs_df = self._clean_jobs(pd.DataFrame(jobs))
+                    jobs_df['site'] = site
+                yield jobs_df
+        finally:
+            # cancel the searches not started yet if the generator is closed early
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+            for executor in executors.values():
+                executor.shutdown(wait=True)
 
-        # check if the jobs is empty, if yes, return empty dataframe, write if_downloaded to True
-        if len(jobs) == 0:
+    def download(self, date_range: int = 31, sort_mode: str = 'date'):
+        """
+        The jobs are downloaded again only if the search changed since the last download: keywords, locations,
+        work_type, date_range or sort_mode. Set if_downloaded to False to download them again anyway.
+
+        :param date_range: number of days back from today to search, default to 31
+        :param sort_mode: sort mode, default to 'date'
+            options: ['relevance', 'date']
+        :return: a dataframe of jobs, a copy of the memoized one
+        """
+        self.date_range = date_range
+        self.sort_mode = sort_mode
+        return _copy_frame(self._search())
+
+    # define a function to download the jobs of the search
+    @stage(params=['keywords', 'locations', 'sites', 'work_type_id', 'date_range', 'sort_mode'])
+    def _search(self):
+        """
+        :return: a dataframe of the cleaned jobs of all the chunks, empty if no job is found
+        """
+        # download all the chunks
+        chunks = list(self.iter_download(date_range=self.date_range, sort_mode=self.sort_mode))
+
+        # check if the jobs is empty, if yes, return empty dataframe
+        if len(chunks) == 0:
             print("No jobs found for all keyword/location combination in given date_range.")
             print("Please try again with different keywords/locations/date_range.")
-            self.if_downloaded = True
             return pd.DataFrame()
 
-        # convert the jobs to dataframe
-        jobs = pd.DataFrame(jobs)
-
-        # define a function to clean the jobs dataframe
-        def _clean_jobs(df):
-            # drop the duplicate jobs based on id
-            df.drop_duplicates(subset=['id'], inplace=True)
-
-            # drop the unnecessary columns: logo, isStandOut, automaticInclusion, displayType, templateFileName,
-            # tracking, solMetadata, branding, categories
-            df.drop(
-                columns=['logo', 'isStandOut', 'automaticInclusion', 'displayType', 'templateFileName', 'tracking',
-                         'solMetadata', 'branding', 'categories'], inplace=True)
-
-            # drop the columns with names in numbers
-            df.drop(columns=[i for i in df.columns if i.isdigit()], inplace=True)
-
-            # rename all camel case columns to snake case
-            df.rename(columns={i: re.sub(r'(?<!^)(?=[A-Z])', '_', i).lower() for i in df.columns}, inplace=True)
-
-            # convert area_id, suburb_id to Int64
-            df['area_id'] = df['area_id'].astype('Int64')
-            df['suburb_id'] = df['suburb_id'].astype('Int64')
-
-            # split the advertiser column, example: {'description': 'Seek Limited', 'id': '20242373'}
-            df['advertiser_title'] = df['advertiser'].apply(lambda x: x['description'])
-            df['advertiser_id'] = df['advertiser'].apply(lambda x: x['id'])
-            df.drop(columns=['advertiser'], inplace=True)
-            # rename the advertiser_title column to advertiser
-            df.rename(columns={'advertiser_title': 'advertiser'}, inplace=True)
-
-            # split the classification column, example: { 'id': '6304', 'description': 'Information & Communication
-            # Technology'}
-            df['classification_title'] = df['classification'].apply(lambda x: x['description'])
-            df['classification_id'] = df['classification'].apply(lambda x: x['id'])
-            df.drop(columns=['classification'], inplace=True)
-            # rename the classification_title column to classification
-            df.rename(columns={'classification_title': 'classification'}, inplace=True)
-
-            # split the sub_classification column, example: {'id': '6311', 'description': 'Database Development'}
-            df['sub_classification_title'] = df['sub_classification'].apply(lambda x: x['description'])
-            df['sub_classification_id'] = df['sub_classification'].apply(lambda x: x['id'])
-            df.drop(columns=['sub_classification'], inplace=True)
-            # rename the sub_classification_title column to sub_classification
-            df.rename(columns={'sub_classification_title': 'sub_classification'}, inplace=True)
-
-            # return the jobs dataframe
-            return df
-
-        # clean the jobs dataframe
-        jobs = _clean_jobs(jobs)
-
-        # write to attribute
-        self.jobs_df = jobs
-        self.if_downloaded = True
+        # combine the cleaned chunks
+        jobs = pd.concat(chunks, ignore_index=True)
 
         print(f"After cleaning, download {len(jobs)} jobs in total.")
 
         # return the jobs dataframe
         return jobs
 
+    # define a function to get the distinct rows of columns of jobs_df, in order of first appearance
+    def _distinct(self, columns):
+        df = self._search()[columns]
+        return df.iloc[self.engine.distinct_positions(df, columns)]
+
     # define a function to get classification_df
+    @stage(inputs=['_search'])
     def _classification_df(self):
         """
         :return: a dataframe of classification
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
 
         # get the classification dataframe
-        classification_df = self.jobs_df[['classification', 'classification_id']].drop_duplicates()
+        classification_df = self._distinct(['classification', 'classification_id'])
         # reset the index
         classification_df.reset_index(drop=True, inplace=True)
 
         # drop null rows
         classification_df.dropna(inplace=True)
-
-        # write to attribute
-        self.classification_df = classification_df
+        # change the type of classification_id to the same as jobs
+        classification_df.classification_id = classification_df.classification_id.astype(int)
 
         # return the classification dataframe
         return classification_df
 
     # define a function to get sub_classification_df
+    @stage(inputs=['_search'])
     def _sub_classification_df(self):
         """
         :return: a dataframe of sub_classification
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
         # get the sub_classification dataframe
-        sub_classification_df = self.jobs_df[['sub_classification', 'sub_classification_id']].drop_duplicates()
+        sub_classification_df = self._distinct(['sub_classification', 'sub_classification_id'])
         # reset the index
         sub_classification_df.reset_index(drop=True, inplace=True)
 
         # drop null rows
         sub_classification_df.dropna(inplace=True)
-
-        # write to attribute
-        self.sub_classification_df = sub_classification_df
+        # change the type of sub_classification_id to the same as jobs
+        sub_classification_df.sub_classification_id = sub_classification_df.sub_classification_id.astype(int)
 
         # return the sub_classification dataframe
         return sub_classification_df
 
     # define a function to get location_df
+    @stage(inputs=['_search'])
     def _location_df(self):
         """
         :return: a dataframe of location
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
         # get the location dataframe
-        location_df = self.jobs_df[['location', 'location_id']].drop_duplicates()
+        location_df = self._distinct(['location', 'location_id'])
         # reset the index
         location_df.reset_index(drop=True)
 
         # drop null rows
         location_df.dropna(inplace=True, how='all')
-
-        # write to attribute
-        self.location_df = location_df
+        # change the type of location_id to the same as jobs
+        location_df.location_id = location_df.location_id.astype(int)
 
         # return the location dataframe
         return location_df
 
     # define a function to get area_df
+    @stage(inputs=['_search'])
     def _area_df(self):
         """
         :return: a dataframe of area
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
         # get the area dataframe
-        area_df = self.jobs_df[['area', 'area_id']].drop_duplicates()
+        area_df = self._distinct(['area', 'area_id'])
         # reset the index
         area_df.reset_index(drop=True, inplace=True)
 
         # drop null rows
         area_df.dropna(inplace=True)
-
-        # write to attribute
-        self.area_df = area_df
+        # change the type of area_id to the same as jobs, take care of the Int64
+        area_df.area_id = area_df.area_id.astype('Int64')
 
         # return the area dataframe
         return area_df
 
     # define a function to get the advertiser_df
+    @stage(inputs=['_search'])
     def _advertiser_df(self):
         """
         :return: a dataframe of advertiser
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
         # get the advertiser dataframe
-        advertiser_df = self.jobs_df[['advertiser', 'advertiser_id']].drop_duplicates()
+        advertiser_df = self._distinct(['advertiser', 'advertiser_id'])
         # reset the index
         advertiser_df.reset_index(drop=True, inplace=True)
 
         # drop null rows
         advertiser_df.dropna(inplace=True)
-
-        # write to attribute
-        self.advertiser_df = advertiser_df
+        # change the type of advertiser_id to the same as jobs
+        advertiser_df.advertiser_id = advertiser_df.advertiser_id.astype(int)
 
         # return the advertiser dataframe
         return advertiser_df
 
     # define a function to get the cleaned jobs dataframe
+    @stage(inputs=['_search'])
     def _jobs_cleaned_df(self):
         """
         :return: a dataframe of jobs
         """
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
         # copy the jobs dataframe
-        jobs_cleaned_df = self.jobs_df.copy()
+        jobs_cleaned_df = self._search().copy()
 
         # drop the unnecessary columns: classification, sub_classification, location, area, suburb_id, advertiser,
         # locationWhereValue, areaWhereValue, suburbWhereValue
@@ -433,14 +634,17 @@ class Jobs:
         # drop null rows
         jobs_cleaned_df.dropna(inplace=True, how='all')
 
-        # write to attribute
-        self.jobs_cleaned_df = jobs_cleaned_df
-
         # return the jobs_cleaned_df
         return jobs_cleaned_df
 
     # define a function to do check_words
-    def _check_words(self, jobs, check_words):
+    def _check_words(self, jobs, check_words, columns=('teaser', 'title')):
+        """
+        :param jobs: jobs dataframe
+        :param check_words: list of words to find
+        :param columns: the text columns to search, the missing columns are ignored, default to teaser and title
+        :return: jobs dataframe with the columns check_words_found and check_words_checked
+        """
         # check for if check_words is None, if so, return the jobs dataframe
         if check_words is None:
             return jobs
@@ -448,29 +652,15 @@ class Jobs:
         # print the row number of jobs dataframe
         print(f"Before checking words, there are {len(jobs)} jobs in total.")
 
-        # extract check_words from teaser, create a new column called "check_words_found_teaser", each keyword
-        # should be a single word, ignore case
-        import re
-        jobs["check_words_found_teaser"] = jobs.teaser.apply(
-            lambda x: re.findall(r"\b(" + "|".join(check_words) + r")\b", x, flags=re.IGNORECASE))
-        # similar to title
-        jobs["check_words_found_title"] = jobs.title.apply(
-            lambda x: re.findall(r"\b(" + "|".join(check_words) + r")\b", x, flags=re.IGNORECASE))
-        # create a new column called "check_words_found", which is the combination of "check_words_found_teaser"
-        # and "check_words_found_title"
-        jobs["check_words_found"] = jobs["check_words_found_teaser"] + jobs["check_words_found_title"]
-        # lower the words in "check_words_found"
-        jobs["check_words_found"] = jobs["check_words_found"].apply(lambda x: [i.lower() for i in x])
-        # eliminate the duplicated value in check_words_found
-        jobs["check_words_found"] = jobs["check_words_found"].apply(lambda x: list(set(x)))
-        # create a new column called "check_words_count", which is the length of "check_words_found"
-        jobs["check_words_count"] = jobs["check_words_found"].apply(lambda x: len(x))
-        # create a new column called "check_words_checked", which is True if "check_words_count" > 1, otherwise
+        # each keyword should be a single word, ignore case
+        # extract check_words from each column, e.g. teaser and title, a missing text has no word, and combine them
+        # to a new column called "check_words_found", lower cased, without duplicated value
+        columns = [col for col in columns if col in jobs.columns]
+        jobs["check_words_found"] = pd.Series(self.engine.find_words(jobs, columns, check_words), index=jobs.index,
+                                              dtype=object)
+        # create a new column called "check_words_checked", which is True if any check word is found, otherwise
         # False
-        jobs["check_words_checked"] = jobs["check_words_count"].apply(lambda x: True if x > 0 else False)
-
-        # drop the unnecessary columns: check_words_found_teaser, check_words_found_title, check_words_count
-        jobs.drop(columns=["check_words_found_teaser", "check_words_found_title", "check_words_count"], inplace=True)
+        jobs["check_words_checked"] = jobs["check_words_found"].apply(lambda x: len(x) > 0)
 
         # print the row number which check_words_checked is True
         print(f"After checking, there are {len(jobs[jobs.check_words_checked])} jobs with check words.")
@@ -478,69 +668,202 @@ class Jobs:
         # return the jobs dataframe
         return jobs
 
-    # define a function to download job details
-    def _download_details(self, check_words=None):
-        # check if the jobs_df is downloaded
-        if not self.if_downloaded:
-            raise ValueError("Please download the jobs_df first")
-        # clean the jobs_df
-        jobs_cleaned_df = self._jobs_cleaned_df()
-
-        # initialize a list to store the jobs_to_download
-        jobs_to_download = []
-        # if check_words is None, jobs_to_download is the id column of jobs_cleaned_df
-        if check_words is None:
-            jobs_to_download = jobs_cleaned_df.id.tolist()
-        # if check_words is not None, call the _check_words function
-        else:
-            jobs_checked_df = self._check_words(jobs_cleaned_df, check_words)
-            # the jobs_to_download is the id column of jobs_checked_df where check_words_checked is True
-            jobs_to_download = jobs_checked_df[jobs_checked_df.check_words_checked].id.tolist()
+    # define a function to convert the job ads to text and count the skills
+    def _process_details(self, jobs, skill_vocabulary=None, n_processes=None):
+        """
+        :param jobs: jobs dataframe with the job_ad_details column
+        :param skill_vocabulary: list of skills to count, default to text.SKILLS
+        :param n_processes: number of processes, default to the number of CPUs
+        :return: jobs dataframe with the job_ad_text column
+        """
+        # start timer
+        start_time = time.time()
 
-        # check if the jobs_to_download is empty, print the message and return jobs_cleaned_df
-        # write to attribute: n_jobs_details_downloaded with 0
-        if len(jobs_to_download) == 0:
-            print("There is no job to download the details.")
-            self.n_jobs_details_downloaded = 0
-            return jobs_cleaned_df
+        # only the jobs with details
+        has_details = jobs.job_ad_details.notna()
+        job_ad_text, skills_matrix = process_details(jobs.job_ad_details[has_details], vocabulary=skill_vocabulary,
+                                                     n_processes=n_processes)
+        jobs["job_ad_text"] = job_ad_text.reindex(jobs.index)
+
+        # write to attribute: one row of skills_matrix per job in skills_job_ids, one column per skill
+        self.skills_matrix = skills_matrix
+        self.skills_job_ids = jobs.id[has_details].tolist()
+        self.skills_vocabulary = list(skill_vocabulary) if skill_vocabulary is not None else None
 
+        print(f"Converted {has_details.sum()} job ads to text, time taken: {(time.time() - start_time):.2f} seconds")
+
+        # return the jobs dataframe
+        return jobs
+
+    # define a function to get the skill statistics
+    def skill_stats(self):
+        """
+        :return: a dataframe of term, n_jobs and share of the jobs with details mentioning each skill
+        """
+        # check if the details are processed
+        if not hasattr(self, 'skills_matrix'):
+            raise ValueError("Please download the job details first")
+
+        return term_stats(self.skills_matrix, self.skills_vocabulary)
+
+    # define a function to add the near duplicate cluster_id
+    def _cluster_jobs(self, jobs, threshold=0.8):
+        """
+        :param jobs: jobs dataframe with the id column
+        :param threshold: minimum estimated Jaccard similarity of the title, teaser and job_ad_details of near
+            duplicates
+        :return: jobs dataframe with the cluster_id column: the id of the first job of the cluster, a job with
+            cluster_id equal to its id is the representative of its cluster
+        """
         # start timer
         start_time = time.time()
 
-        # initialize a list to store the jobs_details
-        jobs_details = []
+        jobs['cluster_id'] = cluster_jobs(jobs, id_column='id', threshold=threshold)
+
+        print(f"Found {jobs.cluster_id.nunique()} clusters of near duplicate jobs in {len(jobs)} jobs, "
+              f"time taken: {(time.time() - start_time):.2f} seconds")
 
-        # loop through the jobs_to_download, create Job class for each job, and download the job details
-        for job_id in jobs_to_download:
-            job = Job(job_id=job_id)
-            job.download()
-            jobs_details.append(job.job_details)
+        # return the jobs dataframe
+        return jobs
 
-        # convert the jobs_details to a dataframe
-        jobs_details_df = pd.DataFrame(jobs_details)
+    # define a function to cluster the near duplicates before downloading the details
+    @stage(inputs=['_jobs_cleaned_df'], params=['skip_near_duplicates', 'near_duplicate_threshold'])
+    def _clustered_df(self):
+        """
+        :return: jobs dataframe, with the cluster_id column if skip_near_duplicates is True
+        """
+        # copy the cleaned jobs, the stages never change their inputs
+        jobs = self._jobs_cleaned_df().copy()
 
-        # left join the job_cleaned_df and jobs_details_df on id
-        jobs_details_df = jobs_cleaned_df.merge(jobs_details_df, on="id", how="left")
+        # cluster the near duplicates on title and teaser, the details are not downloaded yet
+        if self.skip_near_duplicates:
+            with profile_stage(self.profiler, 'cluster_jobs'):
+                jobs = self._cluster_jobs(jobs, threshold=self.near_duplicate_threshold)
 
-        # write to attribute
-        self.jobs_details_df = jobs_details_df
-        self.n_jobs_details_downloaded = len(jobs_details_df)
+        # return the jobs dataframe
+        return jobs
+
+    # define a function to look for check_words in the teasers and titles
+    @stage(inputs=['_clustered_df'], params=['check_words'])
+    def _checked_df(self):
+        """
+        :return: jobs dataframe, with the columns check_words_found and check_words_checked if check_words is not None
+        """
+        jobs = self._clustered_df()
+        if self.check_words is None:
+            return jobs
 
-        # print the time taken
-        print(f"Job details download finished, time taken: {(time.time() - start_time):.2f} seconds")
+        with profile_stage(self.profiler, 'check_words'):
+            return self._check_words(jobs.copy(), self.check_words)
+
+    # define a function to download job details
+    @stage(inputs=['_checked_df'], params=['if_download_details', 'details_deadline', 'max_details',
+                                           'known_advertisers'])
+    def _download_details(self):
+        """
+        The details are downloaded in order of fetch_queue.detail_priority: the jobs with the most check words, the
+        most recent jobs and the jobs of new advertisers first. The jobs left when details_deadline or max_details
+        is reached are deferred to the next run, in self.deferred_job_ids, and have no details, as the jobs whose
+        request timed out at the deadline. The details already in self.job_details are not downloaded again.
+
+        :return: jobs dataframe with the columns in DETAIL_COLUMNS, missing for the jobs without details
+        """
+        jobs_checked_df = self._checked_df()
+
+        # if if_download_details is False, there is no job to download
+        if not self.if_download_details:
+            jobs_to_download = []
+        # if check_words is None, jobs_to_download is the id column of jobs_checked_df
+        elif self.check_words is None:
+            jobs_to_download = jobs_checked_df.id.tolist()
+        # the jobs_to_download is the id column of jobs_checked_df where check_words_checked is True
+        else:
+            jobs_to_download = jobs_checked_df[jobs_checked_df.check_words_checked].id.tolist()
+
+        # only download the details of the first job of each cluster among the jobs to download
+        if self.skip_near_duplicates and len(jobs_to_download) > 0:
+            jobs_to_download = jobs_checked_df[jobs_checked_df.id.isin(jobs_to_download)].drop_duplicates(
+                subset=['cluster_id']).id.tolist()
+            print(f"Skip the near duplicates, download the details of {len(jobs_to_download)} jobs.")
+
+        # write to attribute: the jobs left for the next run
+        self.deferred_job_ids = []
+
+        # the details downloaded by an earlier run are reused
+        jobs_to_fetch = [job_id for job_id in jobs_to_download if job_id not in self.job_details]
+        if self.if_download_details and len(jobs_to_download) == 0:
+            print("There is no job to download the details.")
+        elif len(jobs_to_fetch) < len(jobs_to_download):
+            print(f"Reuse the details of {len(jobs_to_download) - len(jobs_to_fetch)} jobs downloaded before.")
+
+        if len(jobs_to_fetch) > 0:
+            # start timer
+            start_time = time.time()
+
+            # queue the jobs_to_fetch, the most valuable first
+            queue = DetailQueue(jobs_checked_df[jobs_checked_df.id.isin(jobs_to_fetch)],
+                                known_advertisers=self.known_advertisers)
+
+            # pop the jobs until the queue is empty or the budget is spent, create Job class for each job, and
+            # download the job details
+            with profile_stage(self.profiler, 'download_details'):
+                for job_id in queue.drain(deadline=self.details_deadline, max_requests=self.max_details):
+                    job = Job(job_id=job_id)
+                    # a request can not wait past the deadline, a job timed out is deferred to the next run
+                    try:
+                        job.download(timeout=queue.time_left())
+                    except requests.exceptions.Timeout:
+                        queue.defer(job_id)
+                        continue
+                    self.job_details[job_id] = job.job_details
+
+            self.deferred_job_ids = queue.remaining()
+            if self.deferred_job_ids:
+                print(f"Deferred the details of {len(self.deferred_job_ids)} jobs to the next run.")
+
+            # print the time taken
+            print(f"Job details download finished, time taken: {(time.time() - start_time):.2f} seconds")
+
+        # convert the jobs_details to a dataframe, with the same columns if no details are downloaded
+        jobs_details = [self.job_details[job_id] for job_id in jobs_to_download if job_id in self.job_details]
+        jobs_details_df = pd.DataFrame(jobs_details, columns=DETAIL_COLUMNS).astype({'id': jobs_checked_df.id.dtype})
+
+        # left join the jobs_checked_df and jobs_details_df on id
+        jobs_details_df = jobs_checked_df.merge(jobs_details_df, on="id", how="left")
+
+        # write to attribute
+        self.n_jobs_details_downloaded = len(jobs_details)
 
         # return the jobs_details_df
         return jobs_details_df
 
+    # define a function to convert the job ads to text, then look for check_words in the whole job ad
+    @stage(inputs=['_download_details'], params=['skill_vocabulary', 'check_words', 'check_words_in_details'])
+    def _processed_df(self):
+        """
+        :return: jobs dataframe with the job_ad_text column
+        """
+        # copy the jobs with details, the stages never change their inputs
+        jobs = self._download_details().copy()
+
+        # convert the html job ads to text and count the skills
+        with profile_stage(self.profiler, 'process_details'):
+            jobs = self._process_details(jobs, skill_vocabulary=self.skill_vocabulary, n_processes=self.n_processes)
+        if self.check_words is not None and self.check_words_in_details:
+            with profile_stage(self.profiler, 'check_words'):
+                jobs = self._check_words(jobs, self.check_words, columns=('teaser', 'title', 'job_ad_text'))
+
+        # return the jobs dataframe
+        return jobs
+
     # define a function to get the company dataframe
+    @stage(inputs=['_download_details'])
     def _company_review_df(self):
         # check if the n_jobs_details_downloaded is 0, if yes, return blank dataframe
+        jobs_details_df = self._download_details()
         if self.n_jobs_details_downloaded == 0:
             return pd.DataFrame()
 
-        # get the jobs_details_df
-        jobs_details_df = self.jobs_details_df
-
         # get the company_review_df: company_overall_rating, company_profile_url,
         # company_name_review, company_id
         company_review_df = jobs_details_df[["company_overall_rating", "company_profile_url",
@@ -550,102 +873,109 @@ class Jobs:
         company_review_df.drop_duplicates(subset="company_id", inplace=True)
         company_review_df.dropna(subset=["company_id"], inplace=True)
 
-        # write to attribute
-        self.company_review_df = company_review_df
+        # rename company_id to review_company_id
+        company_review_df.rename(columns={"company_id": "review_company_id"}, inplace=True)
 
         # return the company_review_df
         return company_review_df
 
-    # define a function to get all the dataframes
-    def get_all_dfs(self, date_range=31, sort_mode='date', check_words=None, if_download_details=True):
+    # define a function to add the normalized salary columns
+    def _normalize_salary(self, jobs):
         """
-        :return: dataframes of jobs, classification, sub_classification, location, area, advertiser, jobs_cleaned
+        :param jobs: jobs dataframe with the salary column, and salary_type if the details are downloaded
+        :return: jobs dataframe with the columns in salary.SALARY_COLUMNS added
         """
+        # check if the salary column exists
+        if 'salary' not in jobs.columns:
+            return jobs
 
-        # if not downloaded, get the jobs dataframe
-        if not self.if_downloaded:
-            jobs = self.download(date_range=date_range, sort_mode=sort_mode)
-
-        # check if the jobs_cleaned_df is empty, if yes, return
-        if len(self._jobs_cleaned_df()) == 0:
-            return
-
-        # get the classification dataframe
-        classification_df = self._classification_df()
-
-        # get the sub_classification dataframe
-        sub_classification_df = self._sub_classification_df()
-
-        # get the location dataframe
-        location_df = self._location_df()
+        # normalize the salary, salary_type is only available with the job details, the currency not given by the
+        # salary text is the one of the site
+        currency = None
+        if 'site' in jobs.columns:
+            currency = jobs.site.map({site: config['currency'] for site, config in self.sites.items()})
+        salary_df = normalize_salary(jobs.salary, salary_type=jobs.get('salary_type'), currency=currency)
 
-        # get the area dataframe
-        area_df = self._area_df()
+        # return the jobs dataframe with the salary columns
+        return jobs.join(salary_df)
 
-        # get the advertiser dataframe
-        advertiser_df = self._advertiser_df()
-
-        # get the cleaned jobs dataframe
-        jobs_cleaned_df = self._jobs_cleaned_df()
+    # define a function to get the final jobs dataframe
+    @stage(inputs=['_processed_df'], params=['near_duplicate_threshold'])
+    def _final_df(self):
+        """
+        :return: the jobs dataframe of get_all_dfs
+        """
+        with profile_stage(self.profiler, 'final_cleaning'):
+            # copy the processed jobs, the stages never change their inputs
+            jobs = self._processed_df().copy()
 
-        # if if_download_details is True, download the job details
-        if if_download_details:
-            # get the jobs_details dataframe
-            jobs_details_df = self._download_details(check_words=check_words)
-            # set jobs to jobs_details_df
-            jobs = jobs_details_df
-        else:
-            jobs = jobs_cleaned_df
+            # final cleaning for jobs dataframe
+            # remove the company_overall_rating, company_profile_url, company_name_review columns
+            jobs.drop(columns=["company_overall_rating", "company_profile_url", "company_name_review"], inplace=True)
 
-        # get the company_review dataframe
-        company_review_df = self._company_review_df()
+            # listing_date, expiry_date to datetime
+            jobs.listing_date = pd.to_datetime(jobs.listing_date)
+            jobs.expiry_date = pd.to_datetime(jobs.expiry_date)
 
-        # final cleaning for jobs dataframe
-        # remove the company_overall_rating, company_profile_url, company_name_review columns if found in jobs
-        if "company_overall_rating" in jobs.columns:
-            jobs.drop(columns=["company_overall_rating", "company_profile_url", "company_name_review"], inplace=True)
+            # has_role_requirements to nullable boolean, missing for the jobs without details
+            jobs.has_role_requirements = jobs.has_role_requirements.astype('boolean')
 
-        # listing_date, expiry_date to datetime
-        jobs.listing_date = pd.to_datetime(jobs.listing_date)
-        jobs.expiry_date = pd.to_datetime(jobs.expiry_date)
+            # advertiser_id, classification_id, sub_classification_id to int
+            jobs.advertiser_id = jobs.advertiser_id.astype(int)
+            jobs.classification_id = jobs.classification_id.astype(int)
+            jobs.sub_classification_id = jobs.sub_classification_id.astype(int)
 
-        # has_role_requirements to boolean
-        jobs.has_role_requirements = jobs.has_role_requirements.astype(bool)
+            # rename company_id to review_company_id
+            jobs.rename(columns={"company_id": "review_company_id"}, inplace=True)
 
-        # advertiser_id, classification_id, sub_classification_id to int
-        jobs.advertiser_id = jobs.advertiser_id.astype(int)
-        jobs.classification_id = jobs.classification_id.astype(int)
-        jobs.sub_classification_id = jobs.sub_classification_id.astype(int)
+            # cluster the near duplicates on title, teaser and job_ad_details, unless clustered before downloading the
+            # details
+            if "cluster_id" not in jobs.columns:
+                with profile_stage(self.profiler, 'cluster_jobs'):
+                    jobs = self._cluster_jobs(jobs, threshold=self.near_duplicate_threshold)
 
-        # rename company_id to review_company_id
-        jobs.rename(columns={"company_id": "review_company_id"}, inplace=True)
+            # rename id to job_id
+            jobs.rename(columns={"id": "job_id"}, inplace=True)
 
-        # rename id to job_id
-        jobs.rename(columns={"id": "job_id"}, inplace=True)
+            # replacing all null values to np.nan: '[]', '{}', None, blank string,[],{}
+            jobs.replace({'[]': np.nan, '{}': np.nan, '': np.nan, None: np.nan}, inplace=True)
 
-        # replacing all null values to np.nan: '[]', '{}', None, blank string,[],{}
-        jobs.replace({'[]': np.nan, '{}': np.nan, '': np.nan, None: np.nan}, inplace=True)
+        with profile_stage(self.profiler, 'normalize_salary'):
+            # parse the free-text salary to salary_min, salary_max, salary_annualized, etc.
+            jobs = self._normalize_salary(jobs)
 
-        # for company_review_df, rename company_id to review_company_id
-        if len(company_review_df) > 0:
-            company_review_df.rename(columns={"company_id": "review_company_id"}, inplace=True)
+        # return the jobs dataframe
+        return jobs
 
-        # for other dfs other than jobs, change the type of xxx_id to the same as jobs, take care of the Int64
-        classification_df.classification_id = classification_df.classification_id.astype(int)
-        sub_classification_df.sub_classification_id = sub_classification_df.sub_classification_id.astype(int)
-        location_df.location_id = location_df.location_id.astype(int)
-        area_df.area_id = area_df.area_id.astype('Int64')
-        advertiser_df.advertiser_id = advertiser_df.advertiser_id.astype(int)
+    # define a function to get all the dataframes
+    @stage(inputs=['_classification_df', '_sub_classification_df', '_location_df', '_area_df', '_advertiser_df',
+                   '_final_df', '_company_review_df'])
+    def _all_dfs(self):
+        """
+        :return: dataframes of jobs, classification, sub_classification, location, area, advertiser, company_review,
+            jobs_wide
+        """
+        with profile_stage(self.profiler, 'dimension_tables'):
+            classification_df = self._classification_df()
+            sub_classification_df = self._sub_classification_df()
+            location_df = self._location_df()
+            area_df = self._area_df()
+            advertiser_df = self._advertiser_df()
+
+        jobs = self._final_df()
+        company_review_df = self._company_review_df()
 
-        # join all dfs to a single df jobs_wide
-        jobs_wide = jobs.merge(classification_df, on="classification_id", how="left")
-        jobs_wide = jobs_wide.merge(sub_classification_df, on="sub_classification_id", how="left")
-        jobs_wide = jobs_wide.merge(location_df, on="location_id", how="left")
-        jobs_wide = jobs_wide.merge(area_df, on="area_id", how="left")
-        jobs_wide = jobs_wide.merge(advertiser_df, on="advertiser_id", how="left")
-        # if company_review_df is not empty, join it to jobs_wide
-        if len(company_review_df) > 0:
-            jobs_wide = jobs_wide.merge(company_review_df, on="review_company_id", how="left")
+        with profile_stage(self.profiler, 'merges'):
+            # join all dfs to a single df jobs_wide
+            # the engine computes the joins, the result is the same as DataFrame.merge(how="left")
+            jobs_wide = self.engine.merge(jobs, classification_df, on="classification_id")
+            jobs_wide = self.engine.merge(jobs_wide, sub_classification_df, on="sub_classification_id")
+            jobs_wide = self.engine.merge(jobs_wide, location_df, on="location_id")
+            jobs_wide = self.engine.merge(jobs_wide, area_df, on="area_id")
+            jobs_wide = self.engine.merge(jobs_wide, advertiser_df, on="advertiser_id")
+            # if company_review_df is not empty, join it to jobs_wide
+            if len(company_review_df) > 0:
+                jobs_wide = self.engine.merge(jobs_wide, company_review_df, on="review_company_id")
 
         # generate the dataframes dictionary
         df_dict = {'classification': classification_df, 'sub_classification': sub_classification_df,
@@ -655,6 +985,67 @@ class Jobs:
         # return the dataframes dictionary
         return df_dict
 
+    # define a function to get all the dataframes
+    def get_all_dfs(self, date_range=None, sort_mode=None, check_words=None, if_download_details=True,
+                    skip_near_duplicates=False, near_duplicate_threshold=0.8, check_words_in_details=True,
+                    skill_vocabulary=None, n_processes=None, details_deadline=None, max_details=None,
+                    known_advertisers=None):
+        """
+        The dataframes are computed by a graph of memoized stages (see stages.StageGraph): calling get_all_dfs again
+        only computes the stages whose arguments changed, and the stages after them. New check_words do not download
+        or clean the jobs again, and only download the details not downloaded yet. The jobs deferred by
+        details_deadline or max_details are downloaded by the next call, even with the same arguments. The
+        dataframes returned are copies, changing them does not change the memoized stages.
+
+        :param date_range: number of days back from today to search, default to None which means the date_range of
+            the last download, or 31
+        :param sort_mode: sort mode, default to None which means the sort_mode of the last download, or 'date'
+            options: ['relevance', 'date']
+        :param check_words: list of words to find in the teasers and titles, only the details of the jobs with a check
+            word are downloaded, default to None which means all the jobs
+        :param if_download_details: download the job details, default to True
+        :param details_deadline: number of seconds after which no more details are downloaded, the jobs left are
+            kept without details and listed in self.deferred_job_ids, default to None which means no deadline
+        :param max_details: maximum number of details to download, default to None which means no limit
+        :param known_advertisers: the advertiser ids seen in earlier runs, the details of the jobs of new advertisers
+            are downloaded first, default to None
+        :param check_words_in_details: once the details are downloaded, also look for check_words in the text of the
+            job ad, default to True
+        :param skill_vocabulary: list of skills counted in the job ads, default to text.SKILLS, see skill_stats
+        :param n_processes: number of processes converting the job ads to text, default to the number of CPUs
+        :param skip_near_duplicates: only download the details of one job per cluster of near duplicates (same
+            title and teaser reposted under different ids, advertisers or locations), default to False
+        :param near_duplicate_threshold: minimum estimated Jaccard similarity of near duplicates, default to 0.8
+        :return: dataframes of jobs, classification, sub_classification, location, area, advertiser, company_review,
+            jobs_wide, None if no job is found
+        """
+        # write the arguments to the attributes read by the stages
+        if date_range is not None:
+            self.date_range = date_range
+        if sort_mode is not None:
+            self.sort_mode = sort_mode
+        self.check_words = check_words
+        self.if_download_details = if_download_details
+        self.skip_near_duplicates = skip_near_duplicates
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.check_words_in_details = check_words_in_details
+        self.skill_vocabulary = skill_vocabulary
+        self.n_processes = n_processes
+        self.details_deadline = details_deadline
+        self.max_details = max_details
+        self.known_advertisers = known_advertisers
+
+        # the details deferred by the last run are downloaded by this one, whatever the arguments
+        if self.deferred_job_ids:
+            self.stages.invalidate('_download_details')
+
+        # check if the jobs is empty, if yes, return
+        if len(self._search()) == 0:
+            return
+
+        # return copies of the dataframes, the memoized ones are reused by the next call
+        return {table: _copy_frame(df) for table, df in self._all_dfs().items()}
+
 
 # test the Jobs class
 if __name__ == '__main__':
@@ -0,0 +1,191 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# naming convention:
+# engine: runs the relational and text work of the Jobs transforms, 'pandas', 'polars' or 'duckdb'
+# the engines only compute row positions and extracted words on the key and text columns, the frames returned to
+# the callers are built from them with pandas, so every engine returns the same pandas frames, dtypes included
+
+ENGINES = ['pandas', 'polars', 'duckdb']
+
+
+def get_engine(engine='pandas'):
+    """
+    :param engine: an engine name in ENGINES, or an engine instance
+    :return: the engine instance
+    """
+    if not isinstance(engine, str):
+        return engine
+    if engine == 'pandas':
+        return PandasEngine()
+    if engine == 'polars':
+        return PolarsEngine()
+    if engine == 'duckdb':
+        return DuckDBEngine()
+    raise ValueError(f"Invalid engine: {engine}, please choose from {ENGINES}")
+
+
+# define a function to build the words pattern of check_words, shared by the engines
+def words_pattern(check_words):
+    """
+    :param check_words: list of words to find
+    :return: a case-insensitive pattern matching the whole words, without group
+    """
+    return r"(?i)\b(?:" + "|".join(check_words) + r")\b"
+
+
+# define the PandasEngine class: the reference engine, single-threaded pandas
+class PandasEngine:
+    name = 'pandas'
+
+    def distinct_positions(self, df, columns):
+        """
+        :param df: a dataframe
+        :param columns: the columns identifying a row
+        :return: a numpy array of the positions of the first row of each distinct combination of columns, in order,
+            missing values are equal to each other, like DataFrame.drop_duplicates
+        """
+        return np.flatnonzero(~df.duplicated(subset=columns).to_numpy())
+
+    def find_words(self, df, columns, check_words):
+        """
+        :param df: a dataframe
+        :param columns: the text columns, a missing text has no word
+        :param check_words: list of words to find
+        :return: a list per row of the distinct words found in any column, lower cased, sorted
+        """
+        pattern = re.compile(words_pattern(check_words))
+        found = [set() for _ in range(len(df))]
+        for col in columns:
+            for words, text in zip(found, df[col].tolist()):
+                if isinstance(text, str):
+                    words.update(word.lower() for word in pattern.findall(text))
+        return [sorted(words) for words in found]
+
+    def left_join_positions(self, left_keys, right_keys):
+        """
+        :param left_keys: a Series of the join keys of the left rows
+        :param right_keys: a Series of the join keys of the right rows
+        :return: a tuple of numpy arrays (left positions, right positions) of the rows of a left join, ordered like
+            DataFrame.merge(how='left'), -1 for the left rows without a match, the engines other than pandas never
+            match a missing key, the dimension tables have none
+        """
+        left = pd.DataFrame({'key': left_keys.to_numpy(), '_left': np.arange(len(left_keys))})
+        right = pd.DataFrame({'key': right_keys.to_numpy(), '_right': np.arange(len(right_keys))})
+        joined = left.merge(right, on='key', how='left')
+        return joined['_left'].to_numpy(), joined['_right'].fillna(-1).astype(np.int64).to_numpy()
+
+    # define a function to build the rows of a left join from the positions computed by the engine
+    def merge(self, left, right, on):
+        """
+        :param left: the left dataframe
+        :param right: the right dataframe
+        :param on: the join column
+        :return: the same dataframe as left.merge(right, on=on, how='left')
+        """
+        left_positions, right_positions = self.left_join_positions(left[on], right[on])
+        right = right.drop(columns=[on]).reset_index(drop=True)
+        # the left rows without a match get missing values, like pandas merge: int columns become float
+        matched = right.reindex(np.where(right_positions >= 0, right_positions, len(right))).reset_index(drop=True)
+        result = left.iloc[left_positions].reset_index(drop=True)
+        # the columns in both frames get the suffixes of pandas merge
+        overlap = [col for col in matched.columns if col in result.columns]
+        result = result.rename(columns={col: f'{col}_x' for col in overlap})
+        matched = matched.rename(columns={col: f'{col}_y' for col in overlap})
+        return pd.concat([result, matched], axis=1)
+
+
+# define the PolarsEngine class: polars lazy frames, multi-threaded
+class PolarsEngine(PandasEngine):
+    name = 'polars'
+
+    def __init__(self):
+        # polars is an optional dependency
+        import polars
+        self.pl = polars
+
+    # define a function to convert a pandas Series to a polars Series, the object columns to strings
+    def _series(self, name, series):
+        if series.dtype == object:
+            return self.pl.Series(name, [None if pd.isna(v) else str(v) for v in series], dtype=self.pl.String)
+        return self.pl.from_pandas(series.reset_index(drop=True)).alias(name)
+
+    def distinct_positions(self, df, columns):
+        pl = self.pl
+        frame = pl.DataFrame([self._series(f'c{i}', df[col]) for i, col in enumerate(columns)])
+        return (frame.lazy().with_row_index('_row').unique(subset=[f'c{i}' for i in range(len(columns))],
+                                                         keep='first', maintain_order=True)
+                .select('_row').collect()['_row'].to_numpy().astype(np.int64))
+
+    def find_words(self, df, columns, check_words):
+        pl = self.pl
+        pattern = words_pattern(check_words)
+        frame = pl.DataFrame([self._series(col, df[col]) for col in columns])
+        found = frame.lazy().select(
+            pl.concat_list([pl.col(col).str.extract_all(pattern).fill_null([]) for col in columns])
+            .list.eval(pl.element().str.to_lowercase()).list.unique().list.sort().alias('found')
+        ).collect()['found']
+        return found.to_list()
+
+    def left_join_positions(self, left_keys, right_keys):
+        pl = self.pl
+        left = pl.DataFrame([self._series('key', left_keys)]).with_row_index('_left')
+        right = pl.DataFrame([self._series('key', right_keys)]).with_row_index('_right')
+        joined = (left.lazy().join(right.lazy(), on='key', how='left')
+                  .sort(['_left', '_right'], nulls_last=True).collect())
+        return (joined['_left'].to_numpy().astype(np.int64),
+                joined['_right'].fill_null(-1).to_numpy().astype(np.int64))
+
+
+# define the DuckDBEngine class: in-process SQL, multi-threaded
+class DuckDBEngine(PandasEngine):
+    name = 'duckdb'
+
+    def __init__(self):
+        # duckdb is an optional dependency
+        import duckdb
+        self.connection = duckdb.connect()
+
+    # define a function to convert a pandas Series to a column duckdb can scan, the object columns to strings
+    @staticmethod
+    def _column(series):
+        if series.dtype == object:
+            return pd.Series([None if pd.isna(v) else str(v) for v in series], dtype=object)
+        return series.reset_index(drop=True)
+
+    # define a function to run a query on pandas frames registered as views
+    def _query(self, sql, **frames):
+        for name, frame in frames.items():
+            self.connection.register(name, frame)
+        try:
+            return self.connection.execute(sql).df()
+        finally:
+            for name in frames:
+                self.connection.unregister(name)
+
+    def distinct_positions(self, df, columns):
+        frame = pd.DataFrame({f'c{i}': self._column(df[col]) for i, col in enumerate(columns)})
+        frame['_row'] = np.arange(len(df))
+        keys = ', '.join(f'c{i}' for i in range(len(columns)))
+        # GROUP BY puts the missing values in one group, like drop_duplicates
+        result = self._query(f"SELECT min(_row) AS _row FROM frame GROUP BY {keys} ORDER BY _row", frame=frame)
+        return result['_row'].to_numpy(np.int64)
+
+    def find_words(self, df, columns, check_words):
+        pattern = words_pattern(check_words).replace("'", "''")
+        frame = pd.DataFrame({f'c{i}': self._column(df[col]) for i, col in enumerate(columns)})
+        frame['_row'] = np.arange(len(df))
+        found = ' || '.join(f"coalesce(regexp_extract_all(c{i}, '{pattern}'), [])" for i in range(len(columns)))
+        result = self._query(f"SELECT list_sort(list_distinct(list_transform({found}, x -> lower(x)))) AS found "
+                             f"FROM frame ORDER BY _row", frame=frame)
+        return [list(words) for words in result['found']]
+
+    def left_join_positions(self, left_keys, right_keys):
+        left = pd.DataFrame({'key': self._column(left_keys), '_left': np.arange(len(left_keys))})
+        right = pd.DataFrame({'key': self._column(right_keys), '_right': np.arange(len(right_keys))})
+        result = self._query("SELECT l._left, coalesce(r._right, -1) AS _right "
+                             "FROM left_frame AS l LEFT JOIN right_frame AS r ON l.key = r.key "
+                             "ORDER BY l._left, r._right", left_frame=left, right_frame=right)
+        return result['_left'].to_numpy(np.int64), result['_right'].to_numpy(np.int64)
@@ -0,0 +1,156 @@
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+# the weights of the priority components of a job:
+# check_words: number of distinct check words found in the job
+# recency: 1 for a job listed now, halved every RECENCY_HALF_LIFE days
+# new_advertiser: 1 if the advertiser is not in the known advertisers
+PRIORITY_WEIGHTS = {'check_words': 1.0, 'recency': 1.0, 'new_advertiser': 0.5}
+# the age in days halving the recency of a job
+RECENCY_HALF_LIFE = 7
+
+
+def detail_priority(jobs, known_advertisers=None, weights=None, now=None):
+    """
+    :param jobs: jobs dataframe with the listing_date and advertiser_id columns, and check_words_found if the check
+        words are checked
+    :param known_advertisers: the advertiser ids seen before, e.g. a set, a list or df.advertiser_id.unique(), default
+        to None which means no advertiser is known
+    :param weights: weights overriding PRIORITY_WEIGHTS, e.g. {'recency': 2.0}
+    :param now: the time the recency is computed at, default to the current time
+    :return: a Series of priorities with the index of jobs, the higher the sooner
+    """
+    weights = {**PRIORITY_WEIGHTS, **(weights or {})}
+    priority = pd.Series(0.0, index=jobs.index)
+
+    # number of distinct check words found
+    if 'check_words_found' in jobs.columns:
+        n_words = jobs.check_words_found.apply(lambda x: len(x) if isinstance(x, (list, set, tuple)) else 0)
+        priority += weights['check_words'] * n_words
+
+    # recency of listing_date, a missing date has no recency
+    if 'listing_date' in jobs.columns:
+        now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+        if now.tz is None:
+            now = now.tz_localize('UTC')
+        age = (now - pd.to_datetime(jobs.listing_date, utc=True)).dt.total_seconds() / 86400
+        priority += weights['recency'] * np.exp2(-age.clip(lower=0) / RECENCY_HALF_LIFE).fillna(0.0)
+
+    # advertisers new to us
+    if 'advertiser_id' in jobs.columns:
+        # a numpy array or a Series has no truth value, e.g. df.advertiser_id.unique()
+        known_advertisers = {str(i) for i in (() if known_advertisers is None else known_advertisers)}
+        priority += weights['new_advertiser'] * (~jobs.advertiser_id.astype(str).isin(known_advertisers))
+
+    return priority
+
+
+# define the DetailQueue class: the jobs whose details are to download, the most valuable first
+class DetailQueue:
+    """
+    A priority queue of job ids (a binary heap), popped in order of detail_priority. Ties are popped in the order
+    the jobs were pushed.
+
+    Example:
+        queue = DetailQueue(jobs, known_advertisers={'20242373'})
+        for job_id in queue.drain(deadline=600, max_requests=5000):
+            try:
+                Job(job_id).download(timeout=queue.time_left())
+            except requests.exceptions.Timeout:
+                queue.defer(job_id)
+        deferred = queue.remaining()
+    """
+
+    def __init__(self, jobs=None, id_column='id', **priority_kwargs):
+        """
+        :param jobs: jobs dataframe to push, see detail_priority for the columns used, default to None
+        :param id_column: the job id column
+        :param priority_kwargs: known_advertisers, weights and now, passed to detail_priority
+        """
+        self._heap = []
+        self._count = 0
+        # the popped ids given back with defer, not popped again by the drain
+        self._deferred = []
+        # the priority entry of each id pushed, to defer it with its priority
+        self._entries = {}
+        # the end of the running drain, in seconds since the epoch
+        self._deadline = None
+        if jobs is not None and len(jobs) > 0:
+            self.push_jobs(jobs, id_column=id_column, **priority_kwargs)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, job_id, priority):
+        """
+        :param job_id: the job id
+        :param priority: the priority, the higher the sooner
+        """
+        # heapq is a min heap, the priority is negated, the count keeps the order of the ties
+        entry = (-priority, self._count, job_id)
+        heapq.heappush(self._heap, entry)
+        self._entries[job_id] = entry
+        self._count += 1
+
+    def push_jobs(self, jobs, id_column='id', **priority_kwargs):
+        """
+        :param jobs: jobs dataframe to push
+        :param id_column: the job id column
+        :param priority_kwargs: known_advertisers, weights and now, passed to detail_priority
+        """
+        priority = detail_priority(jobs, **priority_kwargs)
+        for job_id, value in zip(jobs[id_column].tolist(), priority.tolist()):
+            self.push(job_id, value)
+
+    def pop(self):
+        """
+        :return: the job id with the highest priority
+        """
+        return heapq.heappop(self._heap)[2]
+
+    def drain(self, deadline=None, max_requests=None):
+        """
+        Pop the job ids until the queue is empty, the deadline is passed or max_requests ids are popped, the ids
+        left stay in the queue.
+
+        :param deadline: number of seconds from the start of the drain after which no id is popped, default to
+            None which means no deadline
+        :param max_requests: maximum number of ids to pop, default to None which means no limit
+        :return: a generator of job ids
+        """
+        self._deadline = None if deadline is None else time.time() + deadline
+
+        n_popped = 0
+        while self._heap:
+            if max_requests is not None and n_popped >= max_requests:
+                return
+            if self._deadline is not None and time.time() >= self._deadline:
+                return
+            n_popped += 1
+            yield self.pop()
+
+    def time_left(self):
+        """
+        :return: the number of seconds left before the deadline of the running drain, at least a millisecond so it
+            can be used as a request timeout, None if there is no deadline
+        """
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.time(), 0.001)
+
+    def defer(self, job_id):
+        """
+        Give back a popped id whose download did not finish, e.g. timed out, it is listed by remaining.
+
+        :param job_id: the job id
+        """
+        self._deferred.append(self._entries[job_id])
+
+    def remaining(self):
+        """
+        :return: the list of job ids left in the queue and deferred, in priority order
+        """
+        return [job_id for _, _, job_id in sorted(self._heap + self._deferred)]
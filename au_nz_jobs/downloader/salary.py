@@ -0,0 +1,165 @@
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+# naming convention:
+# salary_unit: hour, day, week, month, year
+
+# number of units in a year, used to annualize the salary: 38 hours a week, 5 days a week, 52 weeks a year
+UNITS_PER_YEAR = {'hour': 38 * 52, 'day': 5 * 52, 'week': 52, 'month': 12, 'year': 1}
+
+# salary_type from the job details api to salary_unit, e.g. 'HourlyRate' -> 'hour'
+SALARY_TYPE_UNITS = {'hourly': 'hour', 'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'annual': 'year'}
+
+# the columns added by normalize_salary
+SALARY_COLUMNS = ['salary_min', 'salary_max', 'salary_unit', 'salary_currency', 'salary_includes_super',
+                  'salary_annualized']
+
+# precompiled patterns, the salary text is lower cased before matching
+# an amount: optional currency, number with thousands separators, optional k suffix, e.g. 'nz$90,000', '$120k'
+_AMOUNT = re.compile(
+    r'(?P<currency>nzd|aud|nz\$|au\$|a\$|\$)?\s*'
+    r'(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+    r'(?!\.?\d)\s*(?P<k>k\b)?'
+    # skip percentages and durations, e.g. '11% super', '12 month contract', '38 hours'
+    r'(?!\s*(?:%|percent|months?\b|weeks?\b|years?\b|yrs?\b|'
+    r'hours? (?:per|a) week|hrs? (?:per|a) week|days? (?:per|a) week))'
+)
+# range words between two amounts, e.g. '$100k - $120k', '$100k to $120k'
+_RANGE = re.compile(r'^\s*(?:-|–|—|to|and)\s*$')
+_UP_TO = re.compile(r'\b(?:up to|upto|max(?:imum)?|to)\s*$')
+_FROM = re.compile(r'\b(?:from|min(?:imum)?|starting(?: at)?|over|above)\s*$')
+# the times of day, removed before looking for the unit, e.g. '9am to 5pm', '5:30 p.m.'
+_TIME = re.compile(r'(?<![\w$.,])(?:1[0-2]|0?[1-9])(?::[0-5]\d)?\s*[ap]\.?m\b\.?')
+# the short units do not follow a letter, e.g. '$55ph', 'p.a.' but not 'spa'
+_SHORT = r'(?<![a-z])'
+_UNITS = [
+    ('hour', re.compile(_SHORT + r'(?:p/?h\b|p\.h\b)|per hour|/\s*h(?:ou)?r\b|\bhourly\b|\ban hour\b|\bph\b|\bhr\b')),
+    ('day', re.compile(_SHORT + r'(?:p/?d\b|p\.d\b)|per day|/\s*day\b|\bdaily\b|\ba day\b|\bday rate\b')),
+    ('week', re.compile(_SHORT + r'(?:p/?w\b|p\.w\b)|per week|/\s*w(?:ee)?k\b|\bweekly\b|\ba week\b')),
+    ('month', re.compile(_SHORT + r'(?:p/?m\b|p\.m\b)|per month|/\s*month\b|\bmonthly\b|\ba month\b')),
+    ('year', re.compile(_SHORT + r'p\.?\s?a\b|per annum|/\s*y(?:ea)?r\b|\bannual|\bper year\b|\ba year\b|\bpackage\b')),
+]
+_CURRENCIES = [
+    ('NZD', re.compile(r'\bnzd\b|nz\$|\bnz dollars?\b')),
+    ('AUD', re.compile(r'\baud\b|au\$|a\$|\baustralian dollars?\b')),
+]
+_SUPER_INCLUDED = re.compile(r'\binc(?:l|l\.|lusive|luding|\.)?\s*(?:of\s*)?(?:super|kiwisaver)|'
+                             r'(?:super|kiwisaver)\s*inc(?:l|luded|lusive)?\b|'
+                             r'\bpackage\b|\bpkg\b|\btotal remuneration\b')
+_SUPER_EXCLUDED = re.compile(r'(?:\+|\bplus\b|\bexc(?:l|l\.|lusive|luding|\.)?\s*(?:of\s*)?)\s*'
+                             r'(?:\d+(?:\.\d+)?\s*%\s*)?(?:super|kiwisaver)')
+
+
+# define a function to parse a single salary string, memoized because many listings share the same salary text
+@functools.lru_cache(maxsize=65536)
+def parse_salary(text):
+    """
+    :param text: free-text salary, e.g. '$100k - $120k + super'
+    :return: a tuple of (salary_min, salary_max, salary_unit, salary_currency, salary_includes_super), the missing
+        parts are None
+    """
+    # check if the text is a non empty string
+    if not isinstance(text, str) or not text.strip():
+        return None, None, None, None, None
+    text = text.lower()
+
+    # find the amounts
+    amounts = []
+    for match in _AMOUNT.finditer(text):
+        value = float(match.group('number').replace(',', ''))
+        if match.group('k'):
+            value *= 1000
+        amounts.append((value, match))
+    # start from the first amount with a currency symbol if any, bare numbers before it are often noise, e.g.
+    # '2 days wfh, $900 per day', only the amount right after it can be the other end of a range
+    first = next((i for i, amount in enumerate(amounts) if amount[1].group('currency')), 0)
+    amounts = amounts[first:first + 2]
+    # a 'k' on the last amount applies to a bare first amount of a range, e.g. '$100 - 120k'
+    if len(amounts) >= 2 and amounts[1][1].group('k') and not amounts[0][1].group('k') and amounts[0][0] < 1000:
+        amounts[0] = (amounts[0][0] * 1000, amounts[0][1])
+
+    # get the minimum and maximum
+    salary_min, salary_max = None, None
+    if len(amounts) >= 2 and _RANGE.match(text[amounts[0][1].end():amounts[1][1].start()]):
+        salary_min, salary_max = sorted([amounts[0][0], amounts[1][0]])
+    elif amounts:
+        value, match = amounts[0]
+        prefix = text[:match.start()]
+        if _UP_TO.search(prefix):
+            salary_max = value
+        elif _FROM.search(prefix):
+            salary_min = value
+        else:
+            salary_min, salary_max = value, value
+
+    # get the unit, the currency and whether the super is included, a time of day is not a unit, e.g. '9am to 5pm'
+    unit_text = _TIME.sub(' ', text)
+    salary_unit = next((unit for unit, pattern in _UNITS if pattern.search(unit_text)), None)
+    salary_currency = next((currency for currency, pattern in _CURRENCIES if pattern.search(text)), None)
+    if _SUPER_INCLUDED.search(text):
+        salary_includes_super = True
+    elif _SUPER_EXCLUDED.search(text):
+        salary_includes_super = False
+    else:
+        salary_includes_super = None
+
+    return salary_min, salary_max, salary_unit, salary_currency, salary_includes_super
+
+
+# define a function to convert salary_type to salary_unit
+def _salary_type_unit(salary_type):
+    salary_type = salary_type.lower()
+    return next((unit for key, unit in SALARY_TYPE_UNITS.items() if key in salary_type), None)
+
+
+# define a function to guess the unit from the amount when neither the text nor salary_type gives it
+def _guess_unit(amount):
+    return np.select([amount < 300, amount < 2000], ['hour', 'day'], 'year')
+
+
+def normalize_salary(salary, salary_type=None, currency=None):
+    """
+    Parse free-text salaries into numbers. Every distinct salary string is parsed once (see parse_salary), the
+    results are broadcast back to the rows and the unit, currency and annualized salary are computed with
+    vectorized operations.
+
+    :param salary: a Series of free-text salaries
+    :param salary_type: a Series of salary types from the job details, e.g. 'HourlyRate', used when the text does not
+        give the unit, default to None
+    :param currency: the currency when the text does not give it, a string or a Series aligned with salary, default
+        to None
+    :return: a DataFrame with the index of salary and the columns in SALARY_COLUMNS
+    """
+    # parse each distinct salary string once
+    codes, uniques = pd.factorize(salary, use_na_sentinel=True)
+    parsed = [parse_salary(text) for text in uniques]
+    # add a row of missing values for the NaN salaries (code -1)
+    parsed.append((None, None, None, None, None))
+    parsed = pd.DataFrame(parsed, columns=SALARY_COLUMNS[:-1])
+    df = parsed.iloc[codes].set_index(salary.index)
+
+    # numbers to float, unknown unit and currency to NaN
+    df = df.astype({'salary_min': float, 'salary_max': float, 'salary_unit': object, 'salary_currency': object,
+                    'salary_includes_super': object})
+
+    # fill the unit from salary_type, then from the amount
+    if salary_type is not None:
+        type_codes, type_uniques = pd.factorize(salary_type, use_na_sentinel=True)
+        type_units = np.array([_salary_type_unit(str(x)) for x in type_uniques] + [None], dtype=object)
+        df['salary_unit'] = df['salary_unit'].fillna(pd.Series(type_units[type_codes], index=df.index))
+    amount = df[['salary_min', 'salary_max']].mean(axis=1)
+    guess = pd.Series(_guess_unit(amount.to_numpy()), index=df.index).where(amount.notna())
+    df['salary_unit'] = df['salary_unit'].fillna(guess)
+
+    # fill the currency
+    if currency is not None:
+        df['salary_currency'] = df['salary_currency'].fillna(
+            currency if isinstance(currency, str) else pd.Series(currency, index=df.index))
+
+    # annualize the middle of the range
+    df['salary_annualized'] = amount * df['salary_unit'].map(UNITS_PER_YEAR).astype(float)
+
+    return df
@@ -0,0 +1,71 @@
+import warnings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# naming convention:
+# site: the SEEK market a search runs on, 'AU' or 'NZ'
+
+# the SEEK sites: search endpoint, siteKey of the search api, currency of the salaries, number of concurrent
+# searches and size of the connection pool
+SITES = {
+    'AU': {'site_key': 'AU-Main', 'search_url': 'https://www.seek.com.au/api/chalice-search/search',
+           'currency': 'AUD', 'max_workers': 4, 'pool_size': 4},
+    'NZ': {'site_key': 'NZ-Main', 'search_url': 'https://www.seek.co.nz/api/chalice-search/search',
+           'currency': 'NZD', 'max_workers': 4, 'pool_size': 4},
+}
+
+# the site of the locations not found in NZ_LOCATIONS, including the names found in both countries
+DEFAULT_SITE = 'AU'
+
+# New Zealand regions and main cities found only in New Zealand, lower case, searched on the NZ site
+NZ_LOCATIONS = {
+    'new zealand', 'nz',
+    # regions
+    'auckland', 'bay of plenty', 'gisborne', "hawke's bay", 'hawkes bay', 'manawatu', 'manawatu-wanganui',
+    'marlborough', 'nelson', 'otago', 'southland', 'taranaki', 'waikato', 'wairarapa', 'whanganui',
+    # cities and towns
+    'christchurch', 'dunedin', 'tauranga', 'napier', 'palmerston north', 'new plymouth', 'whangarei', 'rotorua',
+    'invercargill', 'queenstown', 'lower hutt', 'upper hutt', 'porirua', 'timaru', 'blenheim', 'taupo', 'manukau',
+    'waitakere',
+}
+
+# New Zealand places whose name is also an Australian place, e.g. Wellington NSW, North Shore in Sydney, they are
+# searched on DEFAULT_SITE unless routed explicitly
+AMBIGUOUS_LOCATIONS = {
+    'canterbury', 'hamilton', 'hastings', 'north shore', 'northland', 'tasman', 'wellington', 'west coast',
+}
+
+
+def location_site(location):
+    """
+    :param location: a location to search, e.g. 'Auckland', 'All Auckland', 'All New Zealand', 'Sydney NSW 2000'
+    :return: the site the location is searched on, 'NZ' for the places found only in New Zealand, 'AU' otherwise,
+        with a warning for the names found in both countries
+    """
+    name = location.strip().lower()
+    # the where values of SEEK, e.g. 'All Auckland'
+    if name.startswith('all '):
+        name = name[len('all '):]
+    # e.g. 'Auckland Central, Auckland'
+    parts = [part.strip() for part in name.split(',')]
+    if name.endswith('new zealand') or any(part in NZ_LOCATIONS for part in parts):
+        return 'NZ'
+    if any(part in AMBIGUOUS_LOCATIONS for part in parts):
+        warnings.warn(f"{location} is a place in both Australia and New Zealand, it is searched on the "
+                      f"{DEFAULT_SITE} site, give the site explicitly to search it on the NZ site, e.g. "
+                      f"Jobs(keywords, {{'NZ': [{location!r}]}})")
+    return DEFAULT_SITE
+
+
+def site_session(site_config):
+    """
+    :param site_config: a site of SITES
+    :return: a requests.Session with a connection pool of pool_size connections, shared by the threads searching
+        the site
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=site_config['pool_size'])
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
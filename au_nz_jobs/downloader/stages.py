@@ -0,0 +1,137 @@
+import functools
+import pickle
+from collections import abc
+
+# naming convention:
+# stage: a method of Jobs turned into a node of the graph with the stage decorator, named after the method
+# inputs: the upstream stages of a stage
+# params: the attributes of Jobs a stage reads, e.g. keywords, check_words
+
+
+# define a function to turn a parameter into a hashable fingerprint, lists, dicts and arrays are compared by value
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset, abc.KeysView)):
+        return tuple(sorted((_freeze(item) for item in value), key=repr))
+    if isinstance(value, (list, tuple, abc.ValuesView)):
+        return tuple(_freeze(item) for item in value)
+    # numpy arrays, pandas Series and Index, compared by their values, their repr is truncated
+    if hasattr(value, 'tolist') and not isinstance(value, (str, bytes)):
+        return _freeze(value.tolist())
+    try:
+        hash(value)
+    except TypeError:
+        # any other unhashable value, e.g. a DataFrame, is compared by its pickled bytes
+        return type(value).__name__, pickle.dumps(value)
+    return value
+
+
+def stage(inputs=(), params=()):
+    """
+    Decorate a method without argument of a class holding a StageGraph in self.stages: calling the method returns
+    the memoized result of the stage, computed again only when one of its params or one of its inputs changed.
+
+    :param inputs: the names of the upstream stages, i.e. the names of their methods
+    :param params: the names of the attributes the stage reads
+    :return: the decorator
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            return self.stages.get(method.__name__)
+        wrapper.stage = (method, tuple(inputs), tuple(params))
+        return wrapper
+    return decorator
+
+
+# define the StageGraph class: the lazily evaluated, memoized stages of an object
+class StageGraph:
+    """
+    The stages of an object as a dependency graph. A stage is evaluated on first access and memoized with a
+    fingerprint of its params and of the versions of its inputs. When a param changes, the stages reading it and
+    their downstream stages are computed again on their next access, the other stages are reused.
+
+    Example:
+        class Pipeline:
+            def __init__(self):
+                self.keywords = ['data']
+                self.stages = StageGraph(self)
+
+            @stage(params=['keywords'])
+            def _search(self):
+                ...
+
+            @stage(inputs=['_search'])
+            def _clean(self):
+                return clean(self._search())
+    """
+
+    def __init__(self, owner):
+        """
+        :param owner: the object whose methods decorated with stage are the stages, the params are its attributes
+        """
+        self.owner = owner
+        # the stages by name: function, inputs, params and the memoized state
+        self._stages = {}
+        for cls in reversed(type(owner).__mro__):
+            for name, attribute in vars(cls).items():
+                if hasattr(attribute, 'stage'):
+                    method, inputs, params = attribute.stage
+                    self._stages[name] = {'function': method, 'inputs': inputs, 'params': params, 'key': None,
+                                          'value': None, 'version': 0, 'runs': 0}
+        # check the inputs are stages
+        for name, node in self._stages.items():
+            for upstream in node['inputs']:
+                if upstream not in self._stages:
+                    raise ValueError(f"Unknown input {upstream} of stage {name}")
+
+    def __contains__(self, name):
+        return name in self._stages
+
+    # define a function to get the fingerprint of a stage, its inputs must be up to date
+    def _key(self, node):
+        return (tuple(self._stages[upstream]['version'] for upstream in node['inputs']),
+                tuple(_freeze(getattr(self.owner, param, None)) for param in node['params']))
+
+    def get(self, name):
+        """
+        :param name: the stage name
+        :return: the result of the stage, computed if its params or inputs changed since the last run
+        """
+        node = self._stages[name]
+        # bring the inputs up to date first, a recomputed input gets a new version
+        for upstream in node['inputs']:
+            self.get(upstream)
+        key = self._key(node)
+        if node['key'] != key:
+            node['value'] = node['function'](self.owner)
+            node['key'] = key
+            node['version'] += 1
+            node['runs'] += 1
+        return node['value']
+
+    def is_valid(self, name):
+        """
+        :param name: the stage name
+        :return: True if the stage would return its memoized result without computing anything
+        """
+        node = self._stages[name]
+        if node['key'] is None or not all(self.is_valid(upstream) for upstream in node['inputs']):
+            return False
+        return node['key'] == self._key(node)
+
+    def invalidate(self, name):
+        """
+        Forget the result of a stage, it and its downstream stages are computed again on their next access.
+
+        :param name: the stage name
+        """
+        self._stages[name]['key'] = None
+
+    def runs(self, name):
+        """
+        :param name: the stage name
+        :return: the number of times the stage was computed
+        """
+        return self._stages[name]['runs']
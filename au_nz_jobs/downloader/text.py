@@ -0,0 +1,143 @@
+import functools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# default skill vocabulary, matched case-insensitively on whole words
+SKILLS = [
+    # languages
+    'python', 'r', 'sql', 'scala', 'java', 'javascript', 'typescript', 'c#', 'c++', '.net', 'go', 'rust', 'sas',
+    'spss', 'matlab', 'vba', 'bash',
+    # data and machine learning
+    'machine learning', 'deep learning', 'nlp', 'natural language processing', 'computer vision', 'statistics',
+    'data modelling', 'data modeling', 'data warehouse', 'data warehousing', 'etl', 'elt', 'data pipelines',
+    'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'spark', 'pyspark', 'hadoop', 'kafka', 'airflow',
+    'dbt', 'databricks', 'snowflake', 'bigquery', 'redshift', 'synapse', 'data factory',
+    # analytics and reporting
+    'excel', 'power bi', 'powerbi', 'tableau', 'qlik', 'looker', 'ssrs', 'ssis', 'dax',
+    # databases
+    'postgresql', 'mysql', 'sql server', 'oracle', 'mongodb',
+    # cloud and engineering
+    'aws', 'azure', 'gcp', 'google cloud', 'docker', 'kubernetes', 'terraform', 'git', 'linux', 'ci/cd', 'devops',
+    'react', 'node.js', 'salesforce', 'sap',
+    # ways of working
+    'agile', 'scrum', 'stakeholder management', 'project management',
+]
+
+# precompiled patterns to convert html to text
+# html elements whose content is not text
+_SKIP_ELEMENTS = re.compile(r'<(script|style|head|title)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+# html tags starting a new line in the text
+_BLOCK_TAGS = re.compile(r'</?(?:p|div|br|li|ul|ol|h[1-6]|tr|table|section|article|header|footer|blockquote|pre)\b'
+                         r'[^>]*>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]*>')
+_COMMENTS = re.compile(r'<!--.*?-->', re.DOTALL)
+# only the runs of spaces and the other white spaces are replaced, replacing every single space is slow
+_SPACES = re.compile(r'[ \t\r\f\v\xa0]{2,}|[\t\r\f\v\xa0]')
+_NEW_LINES = re.compile(r' ?\n[\n ]*')
+
+
+def html_to_text(html):
+    """
+    :param html: an html document, e.g. job_ad_details
+    :return: the text, one line per block element, None if html is not a string
+    """
+    if not isinstance(html, str):
+        return None
+    # the job ads are simple html fragments, regular expressions are several times faster than an html parser
+    text = _SKIP_ELEMENTS.sub(' ', _COMMENTS.sub(' ', html))
+    text = _TAGS.sub('', _BLOCK_TAGS.sub('\n', text))
+    text = _SPACES.sub(' ', unescape(text))
+    return _NEW_LINES.sub('\n', text).strip()
+
+
+# define a function to compile the pattern of a vocabulary, cached in each process
+@functools.lru_cache(maxsize=16)
+def _vocabulary_pattern(vocabulary):
+    # the longest terms first, so 'sql server' wins over 'sql'
+    terms = sorted(vocabulary, key=len, reverse=True)
+    # \b does not work around symbols like 'c#' or '.net', check the neighbours are not word characters instead,
+    # '&' keeps 'r' from matching 'R&D'
+    # the texts are lower cased before matching, IGNORECASE is much slower on a long alternation
+    return re.compile(r'(?<![\w#+&])(' + '|'.join(re.escape(term.lower()) for term in terms) + r')(?![\w#+&])')
+
+
+# define a function to count the terms of the vocabulary in each text
+def _count_terms(texts, vocabulary):
+    pattern = _vocabulary_pattern(vocabulary)
+    term_index = {term.lower(): i for i, term in enumerate(vocabulary)}
+    rows, cols, counts = [], [], []
+    for row, text in enumerate(texts):
+        if not text:
+            continue
+        found = {}
+        for match in pattern.finditer(text.lower()):
+            col = term_index[match.group(1)]
+            found[col] = found.get(col, 0) + 1
+        rows += [row] * len(found)
+        cols += list(found.keys())
+        counts += list(found.values())
+    return rows, cols, counts
+
+
+# define the work of a process: convert a chunk of html documents and count their terms
+def _process_chunk(htmls, vocabulary):
+    texts = [html_to_text(html) for html in htmls]
+    return texts, _count_terms(texts, vocabulary)
+
+
+def process_details(html, vocabulary=None, n_processes=None, chunk_size=1000):
+    """
+    Convert the html of the job ads to text and count the vocabulary terms in each of them. The chunks are processed
+    by a pool of processes.
+
+    :param html: a Series of html documents, e.g. the job_ad_details column
+    :param vocabulary: a list of terms, default to SKILLS
+    :param n_processes: number of processes, default to the number of CPUs, 1 processes in the current process
+    :param chunk_size: number of documents sent to a process at a time
+    :return: a tuple of (a Series of texts with the index of html, a sparse csr matrix of term counts with one row
+        per document and one column per term of the vocabulary)
+    """
+    vocabulary = tuple(SKILLS if vocabulary is None else vocabulary)
+    n_processes = (os.cpu_count() or 1) if n_processes is None else n_processes
+    htmls = html.tolist()
+    chunks = [htmls[start:start + chunk_size] for start in range(0, len(htmls), chunk_size)]
+
+    # a pool only pays off with more than one chunk
+    if n_processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_processes, len(chunks))) as executor:
+            results = list(executor.map(_process_chunk, chunks, [vocabulary] * len(chunks)))
+    else:
+        results = [_process_chunk(chunk, vocabulary) for chunk in chunks]
+
+    # stack the texts and the term counts of the chunks
+    texts, rows, cols, counts = [], [], [], []
+    for start, (chunk_texts, (chunk_rows, chunk_cols, chunk_counts)) in zip(range(0, len(htmls), chunk_size),
+                                                                             results):
+        texts += chunk_texts
+        rows += [start + row for row in chunk_rows]
+        cols += chunk_cols
+        counts += chunk_counts
+    matrix = sparse.csr_matrix((np.array(counts, dtype=np.int32), (rows, cols)),
+                               shape=(len(htmls), len(vocabulary)))
+
+    return pd.Series(texts, index=html.index, dtype=object), matrix
+
+
+def term_stats(matrix, vocabulary=None):
+    """
+    :param matrix: a sparse matrix of term counts, the output of process_details
+    :param vocabulary: the list of terms of the matrix columns, default to SKILLS
+    :return: a DataFrame of term, n_jobs (number of jobs mentioning the term) and share (of all the jobs), sorted
+        by n_jobs
+    """
+    vocabulary = SKILLS if vocabulary is None else vocabulary
+    n_jobs = np.asarray((matrix > 0).sum(axis=0)).ravel()
+    stats = pd.DataFrame({'term': list(vocabulary), 'n_jobs': n_jobs,
+                          'share': n_jobs / matrix.shape[0] if matrix.shape[0] else 0.0})
+    return stats[stats.n_jobs > 0].sort_values('n_jobs', ascending=False, kind='stable').reset_index(drop=True)
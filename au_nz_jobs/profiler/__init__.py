@@ -0,0 +1 @@
+from .profiler import StageProfiler, profile_stage
@@ -0,0 +1,248 @@
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+# a shared no-op context manager, used for every stage when profiling is off
+NO_PROFILE = contextlib.nullcontext()
+
+
+# define a function to reset the peak of the traced memory, tracemalloc.reset_peak is new in Python 3.9
+def _reset_peak():
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+# define a function to get the stage context manager of an optional profiler
+def profile_stage(profiler, name):
+    """
+    :param profiler: a StageProfiler or None
+    :param name: the stage name
+    :return: the stage context manager of the profiler, or a shared no-op context manager if profiler is None
+    """
+    if profiler is None:
+        return NO_PROFILE
+    return profiler.stage(name)
+
+
+# define the StageProfiler class: profile the stages of the pipeline
+class StageProfiler:
+    """
+    Profile named stages with cProfile and tracemalloc. For each stage the wall time, CPU time, peak of the traced
+    memory above the memory at the start of the stage, the top allocation sites and the cProfile statistics are
+    recorded. A stage run several times, e.g. clean_jobs once per chunk, is aggregated under its name.
+
+    Nested stages are excluded from the cProfile statistics of their parent stage, but not from its wall time, CPU
+    time and memory.
+
+    Example:
+        profiler = StageProfiler()
+        jobs = Jobs(keywords, locations, profiler=profiler)
+        df_dict = jobs.get_all_dfs(date_range=3)
+        save_jobs(df_dict, profiler=profiler)
+        profiler.write_report('profile')
+    """
+
+    def __init__(self, top_allocations: int = 10, trace_frames: int = 1):
+        """
+        :param top_allocations: number of allocation sites kept per stage
+        :param trace_frames: number of frames stored by tracemalloc per allocation
+        """
+        self.top_allocations = top_allocations
+        self.trace_frames = trace_frames
+        # the aggregated records by stage name, in order of first run
+        self.stages = {}
+        # the stages being run, innermost last
+        self._stack = []
+        self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        :param name: the stage name
+        :return: a context manager profiling the code it wraps
+        """
+        # start tracing the allocations with the outermost stage
+        if not self._stack and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+
+        # pause the profiler of the parent stage, only one profiler can be active, and fold its peak so far
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent['profile'].disable()
+            parent['peak'] = max(parent['peak'], tracemalloc.get_traced_memory()[1])
+
+        current = {'name': name, 'profile': cProfile.Profile(), 'peak': 0}
+        self._stack.append(current)
+        start_snapshot = tracemalloc.take_snapshot()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        _reset_peak()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        current['profile'].enable()
+        try:
+            yield
+        finally:
+            current['profile'].disable()
+            wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            peak = max(current['peak'], tracemalloc.get_traced_memory()[1])
+            allocations = tracemalloc.take_snapshot().compare_to(start_snapshot, 'lineno')
+            self._stack.pop()
+            self._record(name, wall, cpu, peak - start_memory, allocations, current['profile'])
+
+            # resume the parent stage, its peak includes the peak of this stage
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], peak)
+                _reset_peak()
+                parent['profile'].enable()
+            elif self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    # define a function to aggregate the run of a stage into its record
+    def _record(self, name, wall, cpu, peak, allocations, profile):
+        record = self.stages.setdefault(name, {'name': name, 'calls': 0, 'wall_time': 0.0, 'cpu_time': 0.0,
+                                               'peak_memory': 0, 'allocations': {}, 'stats': None})
+        record['calls'] += 1
+        record['wall_time'] += wall
+        record['cpu_time'] += cpu
+        record['peak_memory'] = max(record['peak_memory'], peak)
+
+        # sum the allocation differences by site
+        for stat in allocations:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            site = f"{frame.filename}:{frame.lineno}"
+            size, count = record['allocations'].get(site, (0, 0))
+            record['allocations'][site] = (size + stat.size_diff, count + stat.count_diff)
+
+        # merge the cProfile statistics
+        profile.create_stats()
+        if not profile.stats:
+            return
+        if record['stats'] is None:
+            record['stats'] = pstats.Stats(profile)
+        else:
+            record['stats'].add(profile)
+
+    def report(self):
+        """
+        :return: a list of dictionaries, one per stage: name, calls, wall_time and cpu_time in seconds,
+            peak_memory in bytes, and top_allocations: a list of site, size and count
+        """
+        report = []
+        for record in self.stages.values():
+            allocations = sorted(record['allocations'].items(), key=lambda x: x[1][0], reverse=True)
+            report.append({
+                'name': record['name'], 'calls': record['calls'], 'wall_time': record['wall_time'],
+                'cpu_time': record['cpu_time'], 'peak_memory': record['peak_memory'],
+                'top_allocations': [{'site': site, 'size': size, 'count': count}
+                                    for site, (size, count) in allocations[:self.top_allocations]],
+            })
+        return report
+
+    def write_report(self, path: str = 'profile'):
+        """
+        Write report.json, report.txt, and one collapsed stack file per stage (<stage>.folded, one
+        "frame;frame;frame microseconds" line per stack) readable by flamegraph.pl, speedscope or inferno.
+
+        :param path: the directory to write to
+        :return: the path
+        """
+        # check if the path exists, if not, create the path
+        if not os.path.exists(f'{path}'):
+            os.makedirs(f'{path}')
+
+        report = self.report()
+        with open(os.path.join(path, 'report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        with open(os.path.join(path, 'report.txt'), 'w') as f:
+            f.write(format_report(report))
+
+        for name, record in self.stages.items():
+            if record['stats'] is None:
+                continue
+            with open(os.path.join(path, f'{name}.folded'), 'w') as f:
+                for stack, microseconds in sorted(collapsed_stacks(record['stats']).items()):
+                    f.write(f'{stack} {microseconds}\n')
+
+        return path
+
+
+# define a function to format the report as a text table
+def format_report(report):
+    """
+    :param report: the output of StageProfiler.report
+    :return: a text table of the stages followed by their top allocation sites
+    """
+    lines = [f"{'stage':<24}{'calls':>6}{'wall (s)':>11}{'cpu (s)':>11}{'peak (MB)':>11}"]
+    for stage in report:
+        lines.append(f"{stage['name']:<24}{stage['calls']:>6}{stage['wall_time']:>11.3f}{stage['cpu_time']:>11.3f}"
+                     f"{stage['peak_memory'] / 2 ** 20:>11.1f}")
+    for stage in report:
+        if not stage['top_allocations']:
+            continue
+        lines.append('')
+        lines.append(f"top allocations of {stage['name']}:")
+        for allocation in stage['top_allocations']:
+            lines.append(f"  {allocation['size'] / 2 ** 20:>9.2f} MB {allocation['count']:>9} blocks  "
+                         f"{allocation['site']}")
+    return '\n'.join(lines) + '\n'
+
+
+# define a function to get the label of a function in a stack
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        # built-in functions, e.g. <built-in method time.sleep>
+        label = name
+    else:
+        label = f'{name} ({os.path.basename(filename)}:{line})'
+    # ';' separates the frames of a collapsed stack
+    return label.replace(';', ':')
+
+
+def collapsed_stacks(stats, min_time=1e-6, max_depth=64):
+    """
+    Rebuild approximate stacks from the caller/callee graph of cProfile: the time of a function is split between
+    its callees in proportion of the time spent in each call edge, like flameprof does.
+
+    :param stats: a pstats.Stats
+    :param min_time: stacks below this time in seconds are pruned
+    :param max_depth: maximum stack depth
+    :return: a dictionary of "frame;frame;frame" to microseconds
+    """
+    entries = stats.stats
+    # the callees of each function, with the cumulative time of the call edge
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    # the roots: functions without profiled callers
+    roots = [func for func, entry in entries.items() if not any(caller in entries for caller in entry[4])]
+
+    stacks = {}
+
+    def walk(func, path, weight):
+        total_time = entries[func][3]
+        scale = weight / total_time if total_time > 0 else 0.0
+        own_time = entries[func][2] * scale
+        if own_time >= min_time:
+            key = ';'.join(_label(f) for f in path)
+            stacks[key] = stacks.get(key, 0) + int(round(own_time * 1e6))
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, []):
+            # skip the recursive calls, they are already in the cumulative time
+            if callee in path or edge_time * scale < min_time:
+                continue
+            walk(callee, path + [callee], edge_time * scale)
+
+    for root in roots:
+        walk(root, [root], entries[root][3])
+
+    return {stack: microseconds for stack, microseconds in stacks.items() if microseconds > 0}
@@ -1 +1,2 @@
-from .save_jobs import save_jobs, save_jobs_sqlite
+from .save_jobs import save_jobs, save_jobs_sqlite, save_jobs_excel
+from .writer import JobsWriter
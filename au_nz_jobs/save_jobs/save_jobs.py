@@ -1,8 +1,19 @@
 import os
-import pandas as pd
-from sql import Sql
 
-def save_jobs(df_dict, format='csv',single_table = True, path='data'):
+from ..profiler import profile_stage
+
+# the maximum number of rows in an Excel sheet, including the header
+EXCEL_MAX_ROWS = 1048576
+# the maximum length of an Excel sheet name
+EXCEL_MAX_SHEET_NAME = 31
+
+
+def save_jobs(df_dict, format='csv',single_table = True, path='data', profiler=None):
+    # check the format before creating anything
+    if format not in ['csv', 'excel']:
+        # raise an error if the format is not supported
+        raise ValueError(f'format {format} is not supported')
+
     # check if the path exists, if not, create the path
     if not os.path.exists(f'{path}'):
         # create the path
@@ -14,36 +25,92 @@ def save_jobs(df_dict, format='csv',single_table = True, path='data'):
         # exclude jobs_wide table in the dictionary
         table_names = [table for table in df_dict.keys() if table != 'jobs_wide']
 
-    # initialize the Excel file and the writer
-    if format == 'excel':
-        # create the Excel file
-        excel = pd.ExcelWriter(f'{path}/jobs.xlsx', engine='xlsxwriter')
+    # record the time and memory of the export if a profiler.StageProfiler is given
+    with profile_stage(profiler, 'save_jobs'):
+        # save all the tables to a single Excel file
+        if format == 'excel':
+            save_jobs_excel(df_dict, table_names, file_name=f'{path}/jobs.xlsx')
+            return
 
-    # loop through the table names to find the corresponding DataFrame
-    for table in table_names:
-        # get the DataFrame
-        df = df_dict[table]
-        # save the DataFrame to local file
-        if format == 'csv':
+        # loop through the table names to find the corresponding DataFrame
+        for table in table_names:
+            # get the DataFrame
+            df = df_dict[table]
             # save the DataFrame to csv file
             df.to_csv(f'{path}/{table}.csv', index=False)
-        elif format == 'excel':
-            # convert all datetime columns to date, check for dtype containing 'datetime'
-            for col in df.columns[df.dtypes.astype(str).str.contains('datetime')]:
-                # convert the datetime column to date
-                df[col] = df[col].dt.date
-            # initiate the Excel writer
-            with pd.ExcelWriter(f'{path}/jobs.xlsx', engine='openpyxl', mode='a') as writer:
-                # save the DataFrame to Excel file
-                df.to_excel(writer, sheet_name=table, index=False)
-        else:
-            # raise an error if the format is not supported
-            raise ValueError(f'format {format} is not supported')
 
-    # close the Excel file
-    if format == 'excel':
+
+# define a function to write all the tables to a single Excel file
+def save_jobs_excel(df_dict, table_names=None, file_name='data/jobs.xlsx', chunk_size=10000,
+                    max_rows=EXCEL_MAX_ROWS):
+    """
+    Write every table through one xlsxwriter workbook in constant_memory mode: rows are flushed to disk as soon as
+    the next row starts, so memory stays flat whatever the table size. The input DataFrames are not modified.
+
+    :param df_dict: a dictionary of DataFrames, e.g. the output of Jobs.get_all_dfs
+    :param table_names: the tables to write, one sheet per table, default to every table in df_dict
+    :param file_name: the Excel file to write
+    :param chunk_size: number of rows converted to Excel values at a time
+    :param max_rows: maximum number of rows per sheet including the header, larger tables are split into
+        several sheets: jobs_wide, jobs_wide_2, ...
+    """
+    # import xlsxwriter here, it is only needed for the Excel export
+    import xlsxwriter
+
+    table_names = list(df_dict.keys()) if table_names is None else table_names
+
+    # datetime columns are written as dates, NaN as blank cells
+    workbook = xlsxwriter.Workbook(file_name, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd',
+                                               'nan_inf_to_errors': True})
+    try:
+        for table in table_names:
+            # get the DataFrame
+            df = df_dict[table]
+            header = [str(col) for col in df.columns]
+
+            # split the table into sheets of at most max_rows - 1 rows, always write at least the header
+            n_rows_sheet = max_rows - 1
+            for n, start in enumerate(range(0, max(len(df), 1), n_rows_sheet)):
+                worksheet = workbook.add_worksheet(_excel_sheet_name(table, n))
+                worksheet.write_row(0, 0, header)
+
+                # in constant_memory mode the rows must be written in order
+                row = 1
+                for chunk_start in range(start, min(start + n_rows_sheet, len(df)), chunk_size):
+                    chunk_end = min(chunk_start + chunk_size, start + n_rows_sheet, len(df))
+                    for values in _excel_rows(df.iloc[chunk_start:chunk_end]):
+                        worksheet.write_row(row, 0, values)
+                        row += 1
+    finally:
         # close the Excel file
-        excel.close()
+        workbook.close()
+
+
+# define a function to get the name of the n-th sheet of a table
+def _excel_sheet_name(table, n):
+    if n == 0:
+        return table[:EXCEL_MAX_SHEET_NAME]
+    suffix = f'_{n + 1}'
+    return table[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+
+
+# define a function to convert a chunk of a DataFrame to rows of values accepted by xlsxwriter
+def _excel_rows(df):
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        # convert all datetime columns to date, check for dtype containing 'datetime'
+        if 'datetime' in str(series.dtype):
+            series = series.dt.date
+        # replace the missing values with None, which is written as a blank cell
+        values = series.astype(object).where(series.notna(), None).tolist()
+        # lists and dictionaries, e.g. bullet_points, are written as their string representation
+        if series.dtype == object:
+            values = [str(x) if isinstance(x, (list, dict, tuple, set)) else x for x in values]
+        columns.append(values)
+
+    return zip(*columns)
+
 
 # define a function to write the job table to sqlite
 def save_jobs_sqlite(df_dict, path='data'):
@@ -51,6 +118,8 @@ def save_jobs_sqlite(df_dict, path='data'):
     if not os.path.exists(f'{path}'):
         # create the database
         open(f'{path}', 'a').close()
+    # import the sql helper here, it is not shipped yet and should not break importing the package
+    from sql import Sql
     # initialize the sql connection
     sql = Sql(path=f'{path}')
     # loop through the table names to find the corresponding DataFrame
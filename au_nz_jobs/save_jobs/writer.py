@@ -0,0 +1,226 @@
+import csv
+import gzip
+import os
+import warnings
+
+# the key of each table in the dictionary returned by Jobs.get_all_dfs, rows sharing a key are written once
+TABLE_KEYS = {
+    'jobs': 'job_id',
+    'jobs_wide': 'job_id',
+    'classification': 'classification_id',
+    'sub_classification': 'sub_classification_id',
+    'location': 'location_id',
+    'area': 'area_id',
+    'advertiser': 'advertiser_id',
+    'company_review': 'review_company_id',
+}
+
+
+# define the JobsWriter class: stream tables to local files chunk by chunk
+class JobsWriter:
+    """
+    Append chunks of jobs and dimension rows to one file per table as they are produced, instead of keeping every
+    table in memory until the end of the crawl.
+
+    - Rows are deduplicated on the table key across chunks, only the keys are kept in memory.
+    - Every table is written to a hidden `.part` file next to its final name and renamed when the writer is
+      closed, so a finished file is never half written. If the writer exits on an exception the `.part` files are
+      kept, they hold every chunk written before the crash.
+    - The csv header is written with the first chunk having rows. A later chunk with new columns widens the header,
+      the rows already written are copied to a new `.part` file with the new columns empty.
+
+    Example:
+        with JobsWriter(path='data', format='jsonl', compression='gzip') as writer:
+            for chunk in jobs.iter_download(date_range=3):
+                writer.write('jobs', chunk, key='id')
+    """
+    FORMATS = ['csv', 'jsonl']
+    COMPRESSIONS = [None, 'gzip']
+
+    def __init__(self, path: str = 'data', format: str = 'csv', compression: str = None, keys: dict = None,
+                 outputs: dict = None):
+        """
+        :param path: the directory to save the files
+        :param format: file format, default to 'csv'
+            options: ['csv', 'jsonl']
+        :param compression: compression of the files, default to None
+            options: [None, 'gzip']
+        :param keys: table name to key column, default to TABLE_KEYS
+        :param outputs: table name to the file to write instead of the file in path, or to an open text stream,
+            e.g. {'jobs': sys.stdout}, a stream is written as is, without `.part` file, and is not closed, default to
+            None
+        """
+        # check the format and compression
+        if format not in self.FORMATS:
+            raise ValueError(f'format {format} is not supported, please choose from {self.FORMATS}')
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f'compression {compression} is not supported, please choose from {self.COMPRESSIONS}')
+
+        self.path = path
+        self.format = format
+        self.compression = compression
+        self.keys = TABLE_KEYS if keys is None else keys
+        self.outputs = {} if outputs is None else outputs
+        self.closed = False
+
+        # open files, header of the csv files, columns of the tables without row yet, keys already written and rows
+        # written, all by table name
+        self._files = {}
+        self._columns = {}
+        self._empty_columns = {}
+        self._seen = {}
+        self.n_rows = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # only publish the files if the block finished without an exception
+        self.close(finalize=exc_type is None)
+
+    # define a function to get the final file name of a table
+    def file_name(self, table):
+        """
+        :param table: table name
+        :return: the path of the finished file, e.g. data/jobs.jsonl.gz
+        """
+        if isinstance(self.outputs.get(table), str):
+            return self.outputs[table]
+        extension = self.format if self.compression is None else f'{self.format}.gz'
+        return os.path.join(self.path, f'{table}.{extension}')
+
+    # define a function to get the temporary file name of a table
+    def _part_name(self, table):
+        directory, name = os.path.split(self.file_name(table))
+        return os.path.join(directory, f'.{name}.part')
+
+    # define a function to check if a table is written to a stream
+    def _is_stream(self, table):
+        return table in self.outputs and not isinstance(self.outputs[table], str)
+
+    # define a function to open the file of a table on its first chunk
+    def _open(self, table):
+        if self._is_stream(table):
+            return self.outputs[table]
+
+        # check if the directory exists, if not, create it
+        directory = os.path.dirname(self._part_name(table))
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if self.compression == 'gzip':
+            return gzip.open(self._part_name(table), 'wt', encoding='utf-8', newline='')
+        return open(self._part_name(table), 'w', encoding='utf-8', newline='')
+
+    def write(self, table: str, df, key: str = None):
+        """
+        :param table: table name, also the file name
+        :param df: a chunk of rows of the table
+        :param key: the column to deduplicate on across chunks, default to the key in `keys`, no deduplication if
+            the column is not in df
+        :return: the number of rows written
+        """
+        if self.closed:
+            raise ValueError('the writer is closed')
+
+        # deduplicate the rows on the key, within the chunk and against the earlier chunks
+        key = self.keys.get(table) if key is None else key
+        if key is not None and key in df.columns:
+            seen = self._seen.setdefault(table, set())
+            df = df.drop_duplicates(subset=[key])
+            df = df[~df[key].isin(seen)]
+            seen.update(df[key].tolist())
+
+        # open the file on the first chunk of the table
+        if table not in self._files:
+            self._files[table] = self._open(table)
+            self.n_rows[table] = 0
+
+        # an empty chunk, e.g. company_review without details, writes nothing, its columns are the header of the
+        # table if no row ever comes
+        if len(df) == 0:
+            if table not in self._columns and len(df.columns) > 0:
+                self._empty_columns[table] = list(df.columns)
+            return 0
+
+        if self.format == 'csv':
+            # the first chunk with rows fixes the header, later chunks are aligned to it
+            header = table not in self._columns
+            if header:
+                self._columns[table] = list(df.columns)
+            else:
+                new_columns = [col for col in df.columns if col not in self._columns[table]]
+                if new_columns:
+                    self._widen(table, new_columns)
+                df = df.reindex(columns=self._columns[table])
+            # the file is new if the header is widened
+            df.to_csv(self._files[table], index=False, header=header)
+        else:
+            # older pandas versions do not end the lines with a newline
+            file = self._files[table]
+            file.write(df.to_json(orient='records', lines=True, date_format='iso', force_ascii=False).rstrip('\n'))
+            file.write('\n')
+
+        # flush the chunk, so it survives a crash later in the crawl
+        self._files[table].flush()
+        self.n_rows[table] += len(df)
+
+        return len(df)
+
+    # define a function to add columns to the csv header of a table, by rewriting the rows already written
+    def _widen(self, table, new_columns):
+        # a stream can not be rewritten, the new columns are dropped
+        if self._is_stream(table):
+            warnings.warn(f"The columns {new_columns} of {table} are not in the csv header already written, they "
+                          f"are dropped")
+            return
+
+        # import pandas here, like the other heavy dependencies of save_jobs
+        import pandas as pd
+
+        # move the rows written to a second .part file and copy them chunk by chunk under the new header, the text
+        # of the cells is kept as is
+        self._files[table].close()
+        part_name = self._part_name(table)
+        old_part_name = f'{part_name}.old'
+        os.replace(part_name, old_part_name)
+        self._columns[table] = self._columns[table] + new_columns
+        self._files[table] = file = self._open(table)
+        pd.DataFrame(columns=self._columns[table]).to_csv(file, index=False)
+        for chunk in pd.read_csv(old_part_name, dtype=str, keep_default_na=False, chunksize=100000,
+                                 compression='gzip' if self.compression == 'gzip' else None):
+            chunk.reindex(columns=self._columns[table]).to_csv(file, index=False, header=False)
+        os.remove(old_part_name)
+
+    def write_dfs(self, df_dict: dict, tables: list = None):
+        """
+        Write every table of a dictionary of dataframes. The tables of get_all_dfs are built in memory by Jobs, the
+        writer deduplicates the rows of successive runs, e.g. one get_all_dfs per day into the same files. Only the
+        search results stream chunk by chunk, from Jobs.iter_download.
+
+        :param df_dict: a dictionary of dataframes by table name, e.g. the output of Jobs.get_all_dfs
+        :param tables: the tables to write, default to every table in df_dict
+        :return: the number of rows written by table
+        """
+        tables = list(df_dict.keys()) if tables is None else tables
+        return {table: self.write(table, df_dict[table]) for table in tables}
+
+    def close(self, finalize: bool = True):
+        """
+        :param finalize: rename the `.part` files to their final names, default to True
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        for table, file in self._files.items():
+            # the header of a table without row, from the columns of its empty chunks
+            if self.format == 'csv' and table not in self._columns and table in self._empty_columns:
+                csv.writer(file, lineterminator=os.linesep).writerow(self._empty_columns[table])
+            # a stream is left open
+            if self._is_stream(table):
+                file.flush()
+                continue
+            file.close()
+            # os.replace is atomic on the same file system, the directory holds either the old or the new file
+            if finalize:
+                os.replace(self._part_name(table), self.file_name(table))
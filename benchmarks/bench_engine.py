@@ -0,0 +1,81 @@
+"""Benchmark of the DataFrame engines on the transforms of get_all_dfs.
+
+Run it from the repository root:
+
+    python benchmarks/bench_engine.py [--rows N] [--engines pandas polars duckdb]
+
+The engines not installed are skipped. polars and duckdb use every core, the gain grows with the number of cores.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from au_nz_jobs.downloader.engine import ENGINES, get_engine  # noqa: E402
+
+CHECK_WORDS = ["data", "analyst", "science", "engineer", "engineering", "scientist", "analytics",
+               "business intelligence", "business analyst", "power bi", "powerbi", "tableau", "python", "R",
+               "machine learning", "ai", "BI"]
+TITLES = ['Data Analyst', 'Senior Data Engineer', 'Business Intelligence Developer', 'Accountant', 'Nurse',
+          'Machine Learning Scientist', 'Project Manager', 'Power BI Developer', 'Electrician', 'Sales Executive']
+TEASERS = ['Join our growing analytics team working with Python and Tableau.',
+           'An exciting opportunity in a fast paced environment.',
+           'Work with stakeholders to deliver business intelligence solutions in Power BI.',
+           'Great culture, flexible working and career progression.']
+
+
+# define a function to build a jobs-sized frame and its dimension tables
+def make_frames(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n_locations, n_advertisers = 60, 20000
+    jobs = pd.DataFrame({
+        'id': np.arange(rows) + 60000000,
+        'title': np.array(TITLES, dtype=object)[rng.integers(0, len(TITLES), rows)],
+        'teaser': np.array(TEASERS, dtype=object)[rng.integers(0, len(TEASERS), rows)],
+        'location_id': rng.integers(0, n_locations, rows),
+        'advertiser_id': rng.integers(0, n_advertisers, rows),
+    })
+    jobs['location'] = 'Location ' + jobs.location_id.astype(str)
+    jobs['advertiser'] = 'Advertiser ' + jobs.advertiser_id.astype(str)
+    location_df = jobs[['location', 'location_id']].drop_duplicates()
+    advertiser_df = jobs[['advertiser', 'advertiser_id']].drop_duplicates()
+    return jobs.drop(columns=['location', 'advertiser']), jobs, location_df, advertiser_df
+
+
+# define a function to time a function
+def timed(function, *args, **kwargs):
+    start_time = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000, help='number of jobs, default to 500000')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES, help='engines to compare')
+    args = parser.parse_args(argv)
+
+    jobs, raw, location_df, advertiser_df = make_frames(args.rows)
+    print(f"rows: {args.rows}, cores: {os.cpu_count()}")
+    print(f"{'engine':<10}{'distinct (s)':>14}{'check_words (s)':>17}{'merges (s)':>12}{'total (s)':>11}")
+    for name in args.engines:
+        try:
+            engine = get_engine(name)
+        except ImportError:
+            print(f"{name:<10} not installed")
+            continue
+        distinct = timed(engine.distinct_positions, raw, ['advertiser', 'advertiser_id'])
+        check_words = timed(engine.find_words, jobs, ['teaser', 'title'], CHECK_WORDS)
+        merges = timed(lambda: engine.merge(engine.merge(jobs, location_df, on='location_id'), advertiser_df,
+                                            on='advertiser_id'))
+        print(f"{name:<10}{distinct:>14.3f}{check_words:>17.3f}{merges:>12.3f}"
+              f"{distinct + check_words + merges:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark of the salary normalization on a jobs-sized frame.
+
+Run it from the repository root:
+
+    python benchmarks/bench_salary.py [--rows N] [--distinct N]
+
+Real crawls repeat the same salary strings a lot, --distinct controls how many different strings the rows share.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from au_nz_jobs.downloader.salary import normalize_salary, parse_salary  # noqa: E402
+
+# templates of the salary strings, filled with random amounts
+TEMPLATES = ['${a}k - ${b}k + super', '${a},000 - ${b},000 p.a. inc super', '${h} - ${h2} per hour',
+             '${d} per day', 'Up to ${b}k package', 'NZD {a},000 - {b},000', 'Competitive salary', '']
+
+
+# define a function to build the salary strings
+def make_salaries(rows, distinct, seed=0):
+    rng = np.random.default_rng(seed)
+    strings = []
+    for i in range(distinct):
+        a = int(rng.integers(60, 200))
+        h = int(rng.integers(30, 120))
+        strings.append(TEMPLATES[i % len(TEMPLATES)].format(a=a, b=a + 20, h=h, h2=h + 10,
+                                                            d=int(rng.integers(500, 1500))))
+    return pd.Series(np.array(strings, dtype=object)[rng.integers(0, distinct, rows)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='number of rows, default to 100000')
+    parser.add_argument('--distinct', type=int, default=5000, help='number of distinct strings, default to 5000')
+    args = parser.parse_args(argv)
+
+    salary = make_salaries(args.rows, args.distinct)
+    salary_type = pd.Series(np.where(np.arange(args.rows) % 3 == 0, 'HourlyRate', None))
+
+    # cold: the memoizing cache is empty, every distinct string is parsed once
+    parse_salary.cache_clear()
+    start_time = time.perf_counter()
+    normalize_salary(salary, salary_type=salary_type)
+    cold = time.perf_counter() - start_time
+
+    # warm: the next crawl shares the salary strings of the previous one
+    start_time = time.perf_counter()
+    normalize_salary(salary, salary_type=salary_type)
+    warm = time.perf_counter() - start_time
+
+    # reference: parse every row in a python loop without the cache
+    start_time = time.perf_counter()
+    [parse_salary.__wrapped__(text) for text in salary]
+    loop = time.perf_counter() - start_time
+
+    print(f"rows: {args.rows}, distinct strings: {args.distinct}")
+    print(f"normalize_salary, cold cache: {cold * 1000:.1f} ms")
+    print(f"normalize_salary, warm cache: {warm * 1000:.1f} ms")
+    print(f"row by row parsing (reference): {loop * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Startup-time benchmark for the au-nz-jobs command line entry point.
+
+Run it from the repository root:
+
+    python benchmarks/bench_startup.py [--repeat N]
+
+Every command is started in a fresh interpreter, the median wall time of N runs is reported next to the
+time of `import pandas` alone, which is what every run used to pay before the imports became lazy.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# the commands to benchmark, as arguments to the python interpreter
+COMMANDS = {
+    'python -c pass': ['-c', 'pass'],
+    'import au_nz_jobs': ['-c', 'import au_nz_jobs'],
+    'au-nz-jobs --help': ['-m', 'au_nz_jobs', '--help'],
+    'au-nz-jobs --version': ['-m', 'au_nz_jobs', '--version'],
+    'au-nz-jobs crawl --help': ['-m', 'au_nz_jobs', 'crawl', '--help'],
+    'import pandas (reference)': ['-c', 'import pandas'],
+    'from au_nz_jobs import Jobs (reference)': ['-c', 'from au_nz_jobs import Jobs'],
+}
+
+
+# define a function to time a single command
+def time_command(args, repeat):
+    """
+    :param args: arguments passed to the python interpreter
+    :param repeat: number of runs
+    :return: list of wall times in seconds
+    """
+    # run from the repository root so the working tree is imported
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=root, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='number of runs per command, default to 10')
+    args = parser.parse_args(argv)
+
+    print(f"{'command':<42}{'median (ms)':>12}{'min (ms)':>12}")
+    for name, command in COMMANDS.items():
+        times = time_command(command, args.repeat)
+        print(f"{name:<42}{statistics.median(times) * 1000:>12.1f}{min(times) * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
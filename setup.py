@@ -18,22 +18,32 @@ test_requirements = ['pytest>=3', ]
 setup(
     author="Robert Tu",
     author_email='tsy0716@gmail.com',
-    python_requires='>=3.6',
+    python_requires='>=3.8',
     classifiers=[
         'Development Status :: 2 - Pre-Alpha',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Natural Language :: English',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
     ],
+    entry_points={
+        'console_scripts': [
+            'au-nz-jobs=au_nz_jobs.cli:main',
+        ],
+    },
     description="A package to download and save jobs in Australian and New Zealand from SEEK.",
     install_requires=requirements,
+    extras_require={
+        'polars': ['polars>=2.0', 'pyarrow'],
+        'duckdb': ['duckdb>=1.5'],
+    },
     license="GNU General Public License v3",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
+    package_data={'au_nz_jobs': ['analysis/data/*.csv']},
     keywords='au_nz_jobs',
     name='au_nz_jobs',
     packages=find_packages(include=['au_nz_jobs', 'au_nz_jobs.*']),
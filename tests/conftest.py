@@ -0,0 +1,89 @@
+"""Shared fixtures: a fake SEEK api, so the pipeline can be tested without network access."""
+
+import pytest
+
+LOCATIONS = {
+    'Sydney': dict(location='Sydney', locationId=1000, locationWhereValue='All Sydney NSW',
+                   area='Parramatta & Western Suburbs', areaId=5070, areaWhereValue='Parramatta & Western Suburbs',
+                   suburb='Parramatta', suburbId=20001, suburbWhereValue='Parramatta NSW 2150'),
+    'Melbourne': dict(location='Melbourne', locationId=1002, locationWhereValue='All Melbourne VIC',
+                      area='CBD & Inner Suburbs', areaId=5080, areaWhereValue='CBD & Inner Suburbs',
+                      suburb='Melbourne', suburbId=20002, suburbWhereValue='Melbourne VIC 3000'),
+    'Auckland': dict(location='Auckland', locationId=1018, locationWhereValue='All Auckland',
+                     area=None, areaId=None, areaWhereValue=None,
+                     suburb='Auckland Central', suburbId=20003, suburbWhereValue='Auckland Central Auckland'),
+}
+
+
+def make_raw_job(job_id, title='Data Scientist', teaser='Join our data team', location='Sydney',
+                 salary='$100k - $120k + super', listing_date='2023-02-27T03:00:00Z', advertiser_id='20242373',
+                 work_type='Full Time', **overrides):
+    """Build a search record shaped like the ones returned by the SEEK search api."""
+    job = dict(
+        id=job_id, title=title, teaser=teaser, salary=salary, listingDate=listing_date, workType=work_type,
+        advertiser={'description': f'Advertiser {advertiser_id}', 'id': advertiser_id},
+        classification={'id': '6304', 'description': 'Information & Communication Technology'},
+        subClassification={'id': '6311', 'description': 'Database Development & Administration'},
+        bulletPoints=['Great team'], roleId='data-scientist',
+        logo={'id': ''}, isStandOut=False, automaticInclusion=False, displayType='standard',
+        templateFileName='', tracking='', solMetadata={}, branding={}, categories=[],
+    )
+    job.update(LOCATIONS[location])
+    job.update(overrides)
+    return job
+
+
+def make_job_details(job_id, job_ad_details='<p>We use <b>Python</b> and SQL.</p>'):
+    """Build a job details record shaped like the ones returned by the SEEK job api."""
+    return dict(expiryDate='2023-03-29T12:59:59Z', salaryType='AnnualPackage', hasRoleRequirements=False,
+                roleRequirements=[], jobAdDetails=job_ad_details,
+                contactMatches=[{'type': 'Email', 'value': 'jobs@example.com'}],
+                companyReview={'companyOverallRating': 4.1, 'companyProfileUrl': 'https://example.com',
+                               'companyName': 'Example', 'companyId': '432'})
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeSeek:
+    """
+    Serve search results by (keyword, location) and job details by job id, recording every request.
+    """
+    PAGE_SIZE = 20
+
+    def __init__(self):
+        self.searches = {}
+        self.details = {}
+        self.requests = []
+
+    def add_search(self, keyword, location, jobs):
+        self.searches[(keyword, location)] = jobs
+        for job in jobs:
+            self.details.setdefault(str(job['id']), make_job_details(job['id']))
+
+    def get(self, url, params=None, **kwargs):
+        self.requests.append((url, params))
+        if params is None:
+            # job details: the job id is the last part of the url
+            return FakeResponse(self.details[url.rsplit('/', 1)[-1]])
+        jobs = self.searches.get((params['keywords'], params['where']), [])
+        page = int(params['page'])
+        return FakeResponse({'totalCount': len(jobs),
+                             'data': jobs[(page - 1) * self.PAGE_SIZE:page * self.PAGE_SIZE]})
+
+
+@pytest.fixture
+def fake_seek(monkeypatch):
+    from au_nz_jobs.downloader import downloader
+
+    seek = FakeSeek()
+    # the searches go through the session of their site, the job details through requests.get
+    monkeypatch.setattr(downloader.requests, 'get', seek.get)
+    monkeypatch.setattr(downloader.requests.Session, 'get',
+                        lambda session, url, params=None, **kwargs: seek.get(url, params=params, **kwargs))
+    return seek
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.analysis`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from au_nz_jobs.analysis import JobsCube
+
+
+@pytest.fixture
+def jobs_wide():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return pd.DataFrame({
+        'job_id': np.arange(n) + 50000000,
+        'listing_date': pd.to_datetime('2023-02-01T00:00:00Z') + pd.to_timedelta(rng.integers(0, 10 * 24, n), unit='h'),
+        'classification': rng.choice(['ICT', 'Engineering'], n),
+        'location': rng.choice(['Sydney', 'Melbourne', None], n),
+        'work_type': rng.choice(['Full Time', 'Contract'], n),
+        'salary_annualized': np.where(rng.random(n) < 0.3, np.nan, rng.normal(100000, 20000, n)),
+    })
+
+
+def test_cube_incremental_updates_match_a_full_regroup(jobs_wide, tmp_path):
+    cube = JobsCube()
+    assert cube.update({'jobs_wide': jobs_wide.iloc[:600]}) == 600
+    # the overlapping jobs are only counted once
+    assert cube.update(jobs_wide.iloc[500:]) == 400
+    assert cube.update(jobs_wide) == 0
+
+    cube.save(str(tmp_path / 'cube.npz'))
+    cube = JobsCube.load(str(tmp_path / 'cube.npz'))
+
+    result = cube.query(by=['classification'], location='Sydney')
+    expected = jobs_wide[jobs_wide.location == 'Sydney'].groupby('classification').salary_annualized.agg(
+        ['size', 'count', 'mean', 'std', 'min', 'max'])
+    assert result.n_jobs.tolist() == expected['size'].tolist()
+    assert result.n_salary.tolist() == expected['count'].tolist()
+    np.testing.assert_allclose(result.salary_mean, expected['mean'])
+    np.testing.assert_allclose(result.salary_std, expected['std'])
+    np.testing.assert_allclose(result.salary_max, expected['max'])
+
+    assert cube.query().n_jobs.tolist() == [1000]
+    assert cube.query(listing_day='2023-02-03').n_jobs.tolist() == [
+        (jobs_wide.listing_date.dt.strftime('%Y-%m-%d') == '2023-02-03').sum()]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""Tests for the `au_nz_jobs` command line entry point."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from au_nz_jobs import cli
+
+
+def test_help_does_not_import_heavy_dependencies():
+    """--help must not pay for pandas, numpy or requests."""
+    code = ("import sys\n"
+            "from au_nz_jobs import cli\n"
+            "try:\n"
+            "    cli.main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(sorted(m for m in ('pandas', 'numpy', 'requests') if m in sys.modules))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().endswith('[]')
+
+
+def test_lazy_package_attributes():
+    import au_nz_jobs
+    from au_nz_jobs.downloader import Jobs
+
+    assert au_nz_jobs.Jobs is Jobs
+    assert callable(au_nz_jobs.save_jobs)
+    with pytest.raises(AttributeError):
+        au_nz_jobs.not_an_attribute
+
+
+def test_parser_requires_command():
+    with pytest.raises(SystemExit):
+        cli.main([])
+
+
+def test_details_reads_job_ids_from_stdin(monkeypatch, capsys):
+    from au_nz_jobs.downloader import Job
+
+    monkeypatch.setattr(Job, 'download', lambda self: {'id': self.job_id})
+    monkeypatch.setattr(sys, 'stdin', ['1\n', '\n', '2\n'])
+
+    assert cli.main(['details', '-']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ['1', '2']
+
+
+def test_crawl_writes_only_csv_to_stdout(fake_seek, capsys):
+    import io
+
+    import pandas as pd
+    from tests.conftest import make_raw_job
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2)])
+
+    assert cli.main(['crawl', '-k', 'data', '-l', 'Sydney', 'Nowhere', '-d', '3']) == 0
+    captured = capsys.readouterr()
+    df = pd.read_csv(io.StringIO(captured.out))
+    assert df.id.tolist() == [1, 2]
+    assert df.columns[0] == 'id'
+    # the progress messages, including the searches without jobs, are on stderr
+    assert 'Downloaded 2 jobs' in captured.err and 'No jobs found' in captured.err
+
+
+def test_crawl_to_a_file_keeps_the_columns_of_every_chunk(fake_seek, tmp_path):
+    import pandas as pd
+    from tests.conftest import make_raw_job
+
+    # the Melbourne chunk has a column the Sydney chunk does not have
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1)])
+    fake_seek.add_search('data', 'Melbourne', [make_raw_job(2, location='Melbourne', companyName='Acme')])
+
+    output = tmp_path / 'search.csv'
+    assert cli.main(['crawl', '-k', 'data', '-l', 'Sydney', 'Melbourne', '-d', '3', '-o', str(output)]) == 0
+    df = pd.read_csv(output)
+    assert df.id.tolist() == [1, 2]
+    assert df.company_name.isna().tolist() == [True, False]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['search.csv']
+
+
+def test_save_reads_the_known_advertisers(monkeypatch, tmp_path):
+    from au_nz_jobs.downloader import Jobs
+
+    calls = {}
+    monkeypatch.setattr(Jobs, 'get_all_dfs', lambda self, **kwargs: calls.update(kwargs))
+    (tmp_path / 'ids.txt').write_text('1\n\n2\n')
+    (tmp_path / 'advertiser.csv').write_text('advertiser,advertiser_id\n"Acme, Inc",3\nB,4\n')
+
+    for file_name, expected in [('ids.txt', {'1', '2'}), ('advertiser.csv', {'3', '4'})]:
+        assert cli.main(['save', '-k', 'data', '-l', 'Sydney', '--known-advertisers', str(tmp_path / file_name)]) == 1
+        assert calls['known_advertisers'] == expected
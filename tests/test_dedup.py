@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.downloader.dedup`."""
+
+import pandas as pd
+
+from au_nz_jobs.downloader.dedup import cluster_jobs
+from tests.conftest import make_raw_job
+
+TEASER = 'Join our growing data team in Sydney and build machine learning models for our customers'
+
+
+def test_cluster_jobs_groups_reposts():
+    df = pd.DataFrame({'id': [10, 11, 12, 13, 14],
+                       'title': ['Data Scientist', 'Chef', 'Data Scientist', '', ''],
+                       'teaser': [TEASER, 'Cook food for our restaurant', TEASER + '!', None, None]})
+
+    assert cluster_jobs(df).tolist() == [10, 11, 10, 13, 14]
+
+
+def test_skip_near_duplicates_downloads_one_detail_per_cluster(fake_seek):
+    from au_nz_jobs import Jobs
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1, teaser=TEASER), make_raw_job(2, teaser=TEASER),
+                                            make_raw_job(3, title='Data Engineer', teaser='Build pipelines')])
+    fake_seek.add_search('data', 'Melbourne', [make_raw_job(4, teaser=TEASER, location='Melbourne',
+                                                            advertiser_id='1')])
+
+    df_dict = Jobs(['data'], ['Sydney', 'Melbourne']).get_all_dfs(date_range=3, skip_near_duplicates=True)
+
+    detail_requests = [url for url, params in fake_seek.requests if params is None]
+    assert len(detail_requests) == 2
+    assert df_dict['jobs'].set_index('job_id').cluster_id.to_dict() == {1: 1, 2: 1, 3: 3, 4: 1}
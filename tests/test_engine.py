@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""Parity tests of the DataFrame engines of `au_nz_jobs.downloader`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from au_nz_jobs.downloader.engine import ENGINES, get_engine
+from tests.conftest import LOCATIONS, make_raw_job
+
+CHECK_WORDS = ['data', 'analyst', 'python', 'R', 'power bi', 'sql']
+
+
+@pytest.fixture(params=[engine for engine in ENGINES if engine != 'pandas'])
+def engine(request):
+    pytest.importorskip(request.param)
+    return get_engine(request.param)
+
+
+def test_engine_primitives_match_pandas(engine):
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'name': rng.choice(['Sydney', 'Melbourne', None], n),
+        'key': pd.array(rng.choice([1, 2, 3, 4], n), dtype='Int64'),
+        'title': rng.choice(['Data Analyst', 'R&D Python developer', 'Power BI / SQL lead', None], n),
+        'teaser': rng.choice(['DATA data data', 'nothing to see', None], n),
+    })
+    df.loc[::7, 'key'] = pd.NA
+    right = pd.DataFrame({'key': pd.array([1, 2, 2, 5], dtype='Int64'), 'label': ['one', 'two', 'deux', 'five'],
+                          'count': [1, 2, 3, 5]})
+    reference = get_engine('pandas')
+
+    assert engine.distinct_positions(df, ['name', 'key']).tolist() == \
+        reference.distinct_positions(df, ['name', 'key']).tolist()
+    assert engine.find_words(df, ['title', 'teaser'], CHECK_WORDS) == \
+        reference.find_words(df, ['title', 'teaser'], CHECK_WORDS)
+    pd.testing.assert_frame_equal(engine.merge(df, right, on='key'), df.merge(right, on='key', how='left'))
+
+
+def test_get_all_dfs_parity(fake_seek, engine):
+    from au_nz_jobs import Jobs
+
+    chatswood = dict(LOCATIONS['Sydney'], area='North Shore & Northern Beaches', areaId=5071)
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2, title='Python Data Engineer'),
+                                            make_raw_job(3, teaser='Power BI reports', **chatswood)])
+    fake_seek.add_search('data', 'Melbourne', [make_raw_job(4, location='Melbourne', advertiser_id='7'),
+                                               make_raw_job(1)])
+    fake_seek.add_search('data', 'Auckland', [make_raw_job(5, location='Auckland', title='Analyst')])
+
+    results = {}
+    for name in ['pandas', engine.name]:
+        results[name] = Jobs(['data'], ['Sydney', 'Melbourne', 'Auckland'], engine=name).get_all_dfs(
+            date_range=3, check_words=CHECK_WORDS, n_processes=1)
+
+    assert results['pandas'].keys() == results[engine.name].keys()
+    for table, df in results['pandas'].items():
+        pd.testing.assert_frame_equal(results[engine.name][table], df, obj=table)
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        get_engine('spark')
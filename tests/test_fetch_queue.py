@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""Tests for the priority queue of the job details downloads."""
+
+import numpy as np
+import pandas as pd
+import requests
+
+from au_nz_jobs.downloader.fetch_queue import DetailQueue, detail_priority
+from tests.conftest import make_raw_job
+
+NOW = '2023-03-01T00:00:00Z'
+
+
+def test_detail_priority_order():
+    jobs = pd.DataFrame({
+        'id': [1, 2, 3, 4, 5],
+        'check_words_found': [['data'], ['data', 'python'], ['data'], ['data'], []],
+        'listing_date': ['2023-02-01T00:00:00Z', '2023-02-01T00:00:00Z', '2023-02-28T00:00:00Z',
+                         '2023-02-01T00:00:00Z', '2023-02-28T00:00:00Z'],
+        'advertiser_id': ['1', '1', '1', '2', '1'],
+    })
+
+    priority = detail_priority(jobs, known_advertisers={'1'}, now=NOW)
+    assert priority.between(0, 3).all()
+
+    queue = DetailQueue(jobs, known_advertisers={'1'}, now=NOW)
+    # more check words, then recent, then a new advertiser, then the rest
+    assert list(queue.drain(max_requests=3)) == [2, 3, 4]
+    assert queue.remaining() == [1, 5]
+    assert len(queue) == 2
+    # an expired deadline pops nothing
+    assert list(queue.drain(deadline=0)) == []
+
+
+def test_details_budget_defers_the_least_valuable_jobs(fake_seek):
+    from au_nz_jobs import Jobs
+
+    # the recency is computed at the current time
+    today = pd.Timestamp.now(tz='UTC').floor('D')
+    old, recent = (today - pd.Timedelta(days=30)).isoformat(), today.isoformat()
+    fake_seek.add_search('data', 'Sydney', [
+        make_raw_job(1, listing_date=old),
+        make_raw_job(2, title='Python Data Engineer', listing_date=old),
+        make_raw_job(3, listing_date=recent),
+    ])
+
+    jobs = Jobs(['data'], ['Sydney'])
+    df_dict = jobs.get_all_dfs(date_range=3, check_words=['data', 'python'], max_details=2)
+
+    detail_requests = [url.rsplit('/', 1)[-1] for url, params in fake_seek.requests if params is None]
+    assert detail_requests == ['2', '3']
+    assert jobs.deferred_job_ids == [1]
+    # the deferred job is kept without details
+    assert df_dict['jobs'].set_index('job_id').job_ad_details.isna().to_dict() == {1: True, 2: False, 3: False}
+    assert df_dict['jobs'].set_index('job_id').has_role_requirements.isna().to_dict() == {1: True, 2: False, 3: False}
+
+    # the same arguments download the deferred job, the details downloaded before are reused
+    df_dict = jobs.get_all_dfs(date_range=3, check_words=['data', 'python'], max_details=2)
+    detail_requests = [url.rsplit('/', 1)[-1] for url, params in fake_seek.requests if params is None]
+    assert detail_requests == ['2', '3', '1']
+    assert jobs.deferred_job_ids == []
+    assert df_dict['jobs'].job_ad_details.notna().all()
+
+    # nothing is deferred, the next call is memoized
+    jobs.get_all_dfs(date_range=3, check_words=['data', 'python'], max_details=2)
+    assert jobs.stages.runs('_download_details') == 2
+
+
+def test_details_deadline_caps_the_request_timeout(fake_seek, monkeypatch):
+    from au_nz_jobs import Jobs
+    from au_nz_jobs.downloader import downloader
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2), make_raw_job(3)])
+    timeouts = []
+
+    # the details of job 2 stall until the timeout
+    def get(url, params=None, timeout=None, **kwargs):
+        if params is None:
+            timeouts.append(timeout)
+            if url.endswith('/2'):
+                raise requests.exceptions.ReadTimeout(url)
+        return fake_seek.get(url, params=params, **kwargs)
+    monkeypatch.setattr(downloader.requests, 'get', get)
+
+    jobs = Jobs(['data'], ['Sydney'])
+    df_dict = jobs.get_all_dfs(date_range=3, details_deadline=60)
+
+    assert len(timeouts) == 3
+    assert all(0 < timeout <= 60 for timeout in timeouts)
+    # the job timed out is deferred, the next ones are downloaded
+    assert jobs.deferred_job_ids == [2]
+    assert df_dict['jobs'].set_index('job_id').job_ad_details.isna().to_dict() == {1: False, 2: True, 3: False}
+
+
+def test_deferred_ids_keep_their_priority():
+    queue = DetailQueue()
+    for job_id, priority in [(1, 3.0), (2, 2.0), (3, 1.0)]:
+        queue.push(job_id, priority)
+    assert queue.time_left() is None
+
+    popped = []
+    for job_id in queue.drain(deadline=60):
+        assert 0 < queue.time_left() <= 60
+        popped.append(job_id)
+        if job_id == 2:
+            queue.defer(job_id)
+    assert popped == [1, 2, 3]
+    assert queue.remaining() == [2]
+
+
+def test_known_advertisers_as_arrays():
+    jobs = pd.DataFrame({'id': [1, 2], 'listing_date': [NOW, NOW], 'advertiser_id': ['1', '2']})
+    for known_advertisers in [np.array(['1']), pd.Series(['1']), jobs.advertiser_id.unique()[:1]]:
+        assert detail_priority(jobs, known_advertisers=known_advertisers, now=NOW).tolist() == [1.0, 1.5]
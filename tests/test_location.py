@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.analysis.location`."""
+
+import pandas as pd
+
+from au_nz_jobs.analysis import LocationIndex
+from tests.conftest import LOCATIONS, make_raw_job
+
+
+def test_location_index_rollup_and_radius(fake_seek, tmp_path):
+    from au_nz_jobs import Jobs
+
+    chatswood = dict(LOCATIONS['Sydney'], area='North Shore & Northern Beaches', areaId=5071, suburb='Chatswood',
+                     suburbId=20004, suburbWhereValue='Chatswood NSW 2067')
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2, **chatswood),
+                                            make_raw_job(3, location='Melbourne')])
+    fake_seek.add_search('data', 'Auckland', [make_raw_job(4, location='Auckland')])
+
+    jobs = Jobs(['data'], ['Sydney', 'Auckland'])
+    df_dict = jobs.get_all_dfs(date_range=3)
+    jobs_wide = df_dict['jobs_wide'].set_index('job_id')
+
+    index = LocationIndex()
+    index.update(jobs.jobs_df)
+    assert index.nodes['suburb'][20001] == {'name': 'Parramatta', 'area': 5070, 'location': 1000, 'state': 'NSW',
+                                            'country': 'Australia'}
+    assert index.rollup(jobs_wide, level='state').to_dict() == {1: 'NSW', 2: 'NSW', 3: 'VIC', 4: 'Auckland'}
+    assert index.rollup(jobs_wide, level='country').to_dict() == {1: 'Australia', 2: 'Australia', 3: 'Australia',
+                                                                   4: 'New Zealand'}
+    # Auckland has no area
+    assert index.rollup(jobs_wide, level='area').isna().to_dict() == {1: False, 2: False, 3: False, 4: True}
+
+    index.set_centroids()
+    index.save(str(tmp_path / 'locations.json'))
+    index = LocationIndex.load(str(tmp_path / 'locations.json'))
+
+    # Chatswood is about 19 km from Parramatta, the Melbourne CBD more than 700 km
+    nearby = index.within('Parramatta', 30)
+    assert set(nearby.name) >= {'Parramatta', 'Chatswood', 'Sydney'}
+    assert 15 < nearby.set_index('name').distance_km['Chatswood'] < 22
+    assert index.jobs_within(jobs_wide, 'Parramatta', 30).to_dict() == {1: True, 2: True, 3: False, 4: False}
+    assert index.jobs_within(jobs_wide, 'Parramatta', 10).to_dict() == {1: True, 2: False, 3: False, 4: False}
+    # a place known from the centroid table only
+    assert index.jobs_within(jobs_wide, 'Penrith', 35).tolist() == [True, False, False, False]
+
+
+def test_user_centroids():
+    jobs = pd.DataFrame({'location_id': [1, 2], 'location': ['Here', 'There'], 'suburb_id': [10, pd.NA]})
+    index = LocationIndex()
+    index.update(jobs)
+    assert index.set_centroids(pd.DataFrame({'level': ['location', 'location'], 'name': ['Here', 'There'],
+                                             'latitude': [0.0, 0.0], 'longitude': [0.0, 1.0]})) == 2
+    # one degree of longitude at the equator is about 111 km
+    assert index.within((0.0, 0.0), 120).name.tolist() == ['Here', 'There']
+    assert index.within((0.0, 0.0), 100).name.tolist() == ['Here']
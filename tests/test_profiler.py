@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.profiler`."""
+
+import json
+import tracemalloc
+
+from au_nz_jobs.profiler import StageProfiler, profile_stage
+from au_nz_jobs.profiler.profiler import NO_PROFILE
+from tests.conftest import make_raw_job
+
+
+def test_profiler_records_the_pipeline_stages(fake_seek, tmp_path):
+    from au_nz_jobs import Jobs, save_jobs
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2, title='Data Engineer')])
+    fake_seek.add_search('data', 'Melbourne', [make_raw_job(3, location='Melbourne')])
+
+    profiler = StageProfiler()
+    df_dict = Jobs(['data'], ['Sydney', 'Melbourne'], profiler=profiler).get_all_dfs(date_range=3,
+                                                                                      check_words=['data'])
+    save_jobs(df_dict, path=str(tmp_path / 'data'), profiler=profiler)
+    profiler.write_report(str(tmp_path / 'profile'))
+
+    report = {stage['name']: stage for stage in profiler.report()}
+    assert {'download_jobs', 'clean_jobs', 'dimension_tables', 'check_words', 'download_details',
+            'process_details', 'cluster_jobs', 'final_cleaning', 'normalize_salary', 'merges',
+            'save_jobs'} <= set(report)
+    # one run per pair of keyword and location, check_words runs on the teasers then on the job ads
+    assert report['download_jobs']['calls'] == 2
+    assert report['check_words']['calls'] == 2
+    assert all(stage['wall_time'] > 0 and stage['peak_memory'] >= 0 for stage in report.values())
+    # the outermost stage stops the tracing it started
+    assert not tracemalloc.is_tracing()
+
+    assert json.loads((tmp_path / 'profile' / 'report.json').read_text())[0]['name'] == 'download_jobs'
+    assert 'normalize_salary' in (tmp_path / 'profile' / 'report.txt').read_text()
+    folded = (tmp_path / 'profile' / 'normalize_salary.folded').read_text().splitlines()
+    assert folded and all(int(line.rsplit(' ', 1)[1]) > 0 for line in folded)
+
+
+def test_nested_stages_and_no_profiler():
+    assert profile_stage(None, 'stage') is NO_PROFILE
+
+    profiler = StageProfiler()
+    with profiler.stage('outer'):
+        buffer = bytearray(2 ** 20)
+        with profiler.stage('inner'):
+            inner_buffer = bytearray(4 * 2 ** 20)
+            del inner_buffer
+        del buffer
+
+    report = {stage['name']: stage for stage in profiler.report()}
+    # the peak of the outer stage includes the peak of the inner stage
+    assert report['inner']['peak_memory'] >= 3.9 * 2 ** 20
+    assert report['outer']['peak_memory'] >= 4.9 * 2 ** 20
+    assert report['outer']['wall_time'] >= report['inner']['wall_time']
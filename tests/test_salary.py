@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.downloader.salary`."""
+
+import pandas as pd
+import pytest
+
+from au_nz_jobs.downloader.salary import normalize_salary, parse_salary
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$120,000 - $140,000 + Super', (120000, 140000, None, None, False)),
+    ('$90k - $110k p.a. + super', (90000, 110000, 'year', None, False)),
+    ('$55 - $65 p.h. + 11.5% super', (55, 65, 'hour', None, False)),
+    ('12 month contract, $900/day', (900, 900, 'day', None, None)),
+    ('Up to $150k package', (None, 150000, 'year', None, True)),
+    ('$100 - 120k inc super', (100000, 120000, None, None, True)),
+    ('NZD 90,000 - 110,000', (90000, 110000, None, 'NZD', None)),
+    ('From AU$95,000', (95000, None, None, 'AUD', None)),
+    ('$30 - $35 9am to 5pm Mon-Fri', (30, 35, None, None, None)),
+    ('$55 p/h, 9:00 a.m. - 5:30 p.m.', (55, 55, 'hour', None, None)),
+    ('Day spa therapist $28 - $32', (28, 32, None, None, None)),
+    ('$5,000pm', (5000, 5000, 'month', None, None)),
+    ('Competitive salary', (None, None, None, None, None)),
+    (None, (None, None, None, None, None)),
+])
+def test_parse_salary(text, expected):
+    assert parse_salary(text) == expected
+
+
+def test_normalize_salary_fills_unit_and_annualizes():
+    salary = pd.Series(['$55 - $65', None, '$120k', '$800', 'Competitive'], index=[10, 11, 12, 13, 14])
+    salary_type = pd.Series(['HourlyRate', None, None, None, 'AnnualPackage'], index=salary.index)
+
+    df = normalize_salary(salary, salary_type=salary_type, currency='AUD')
+
+    assert df.index.tolist() == salary.index.tolist()
+    assert df.salary_unit.fillna('').tolist()[:4] == ['hour', '', 'year', 'day']
+    assert df.salary_annualized.tolist()[0] == 60 * 38 * 52
+    assert df.salary_annualized.tolist()[3] == 800 * 5 * 52
+    assert df.salary_annualized.isna().tolist() == [False, True, False, False, True]
+    assert df.salary_currency.tolist() == ['AUD'] * 5
+
+
+def test_normalize_salary_ignores_the_times_of_day():
+    salary = pd.Series(['$30 - $35 9am to 5pm Mon-Fri'])
+    df = normalize_salary(salary, salary_type=pd.Series(['HourlyRate']))
+    assert df.salary_unit.tolist() == ['hour']
+    assert df.salary_annualized.tolist() == [32.5 * 38 * 52]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.save_jobs`."""
+
+import gzip
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from au_nz_jobs.save_jobs import JobsWriter
+
+
+def test_writer_deduplicates_across_chunks_and_renames_on_close(tmp_path):
+    with JobsWriter(path=str(tmp_path)) as writer:
+        writer.write('classification', pd.DataFrame({'classification': ['a', 'b'], 'classification_id': [1, 2]}))
+        writer.write('classification', pd.DataFrame({'classification': ['b', 'c'], 'classification_id': [2, 3]}))
+        # nothing is published before the writer is closed
+        assert not os.path.exists(tmp_path / 'classification.csv')
+
+    df = pd.read_csv(tmp_path / 'classification.csv')
+    assert df.classification_id.tolist() == [1, 2, 3]
+    assert writer.n_rows == {'classification': 3}
+
+
+def test_writer_gzip_jsonl(tmp_path):
+    with JobsWriter(path=str(tmp_path), format='jsonl', compression='gzip') as writer:
+        writer.write('jobs', pd.DataFrame({'job_id': [1, 2]}))
+        writer.write('jobs', pd.DataFrame({'job_id': [2, 3], 'title': ['x', 'y']}))
+
+    with gzip.open(tmp_path / 'jobs.jsonl.gz', 'rt') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['job_id'] for row in rows] == [1, 2, 3]
+
+
+def test_writer_keeps_part_files_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with JobsWriter(path=str(tmp_path)) as writer:
+            writer.write('jobs', pd.DataFrame({'job_id': [1]}))
+            raise RuntimeError('crawl failed')
+
+    assert os.listdir(tmp_path) == ['.jobs.csv.part']
+
+
+def test_iter_download_streams_unique_chunks(fake_seek, tmp_path):
+    from au_nz_jobs import Jobs
+    from tests.conftest import make_raw_job
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(i) for i in range(25)])
+    fake_seek.add_search('data', 'Melbourne', [make_raw_job(i, location='Melbourne') for i in range(20, 30)])
+
+    jobs = Jobs(['data'], ['Sydney', 'Melbourne'])
+    with JobsWriter(path=str(tmp_path)) as writer:
+        sizes = [writer.write('jobs', chunk, key='id') for chunk in jobs.iter_download(date_range=3)]
+
+    assert sizes == [25, 5]
+    assert len(pd.read_csv(tmp_path / 'jobs.csv')) == 30
+
+
+def test_iter_download_keeps_max_workers_searches_in_flight(fake_seek):
+    from au_nz_jobs import Jobs
+    from tests.conftest import make_raw_job
+
+    keywords = ['data', 'python', 'sql', 'spark', 'excel']
+    for i, keyword in enumerate(keywords):
+        fake_seek.add_search(keyword, 'Sydney', [make_raw_job(i)])
+
+    jobs = Jobs(keywords, ['Sydney'], sites={'AU': {'max_workers': 1}})
+    chunks = jobs.iter_download(date_range=3)
+    next(chunks)
+    # the first search, and the next one submitted when its chunk is taken
+    assert len({params['keywords'] for url, params in fake_seek.requests}) <= 2
+    assert len(list(chunks)) == 4
+
+
+def test_excel_splits_large_tables_without_mutating_input(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    from au_nz_jobs.save_jobs import save_jobs_excel
+
+    jobs = pd.DataFrame({'job_id': range(5), 'listing_date': pd.to_datetime(['2023-02-27T03:00:00Z'] * 5),
+                         'bullet_points': [['a'], ['b'], None, ['d'], ['e']],
+                         'area_id': pd.array([1, None, 3, 4, 5], dtype='Int64')})
+    dtypes = jobs.dtypes.copy()
+    save_jobs_excel({'jobs': jobs, 'area': pd.DataFrame({'area_id': []})}, file_name=str(tmp_path / 'jobs.xlsx'),
+                    chunk_size=2, max_rows=3)
+
+    assert jobs.dtypes.equals(dtypes)
+    workbook = openpyxl.load_workbook(tmp_path / 'jobs.xlsx')
+    assert workbook.sheetnames == ['jobs', 'jobs_2', 'jobs_3', 'area']
+    rows = [row for name in ['jobs', 'jobs_2', 'jobs_3']
+            for row in workbook[name].iter_rows(min_row=2, values_only=True)]
+    assert [row[0] for row in rows] == [0, 1, 2, 3, 4]
+    assert rows[0][2] == "['a']" and rows[2][2] is None and rows[1][3] is None
+    assert rows[0][1].date().isoformat() == '2023-02-27'
+
+
+def test_writer_csv_header_from_the_first_chunk_with_rows(tmp_path):
+    with JobsWriter(path=str(tmp_path)) as writer:
+        # an empty first chunk does not fix the header
+        writer.write('classification', pd.DataFrame({'classification_id': [], 'classification': []}))
+        writer.write('classification', pd.DataFrame({'classification_id': [3], 'classification': ['c']}))
+        # get_all_dfs returns an empty company_review without columns when no details are downloaded
+        writer.write('company_review', pd.DataFrame())
+        writer.write('company_review', pd.DataFrame({'review_company_id': ['432'], 'company_name_review': ['x']}))
+        # a table without row keeps the header of its empty chunks
+        writer.write('area', pd.DataFrame({'area_id': [], 'area': []}))
+
+    assert (tmp_path / 'classification.csv').read_text() == 'classification_id,classification\n3,c\n'
+    assert (tmp_path / 'company_review.csv').read_text() == 'review_company_id,company_name_review\n432,x\n'
+    assert (tmp_path / 'area.csv').read_text() == 'area_id,area\n'
+
+
+def test_writer_widens_the_csv_header(tmp_path):
+    outputs = {'jobs': str(tmp_path / 'search.csv.gz')}
+    with JobsWriter(path=str(tmp_path), compression='gzip', outputs=outputs) as writer:
+        writer.write('jobs', pd.DataFrame({'id': [1, 2], 'title': ['a, b', None]}), key='id')
+        writer.write('jobs', pd.DataFrame({'id': [3], 'salary': ['$100k'], 'title': ['c']}), key='id')
+
+    df = pd.read_csv(tmp_path / 'search.csv.gz', keep_default_na=False)
+    assert df.columns.tolist() == ['id', 'title', 'salary']
+    assert df.values.tolist() == [[1, 'a, b', ''], [2, '', ''], [3, 'c', '$100k']]
+    assert sorted(os.listdir(tmp_path)) == ['search.csv.gz']
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.analysis.similarity`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from au_nz_jobs.analysis import SimilarityIndex
+from au_nz_jobs.analysis.similarity import tokenize
+from tests.conftest import make_raw_job
+
+JOBS = pd.DataFrame({
+    'job_id': [1, 2, 3, 4, 5],
+    'title': ['Power BI Developer', 'Senior Power BI Analyst', 'Registered Nurse', 'C++ Engineer', 'Data Analyst'],
+    'teaser': ['Build Power BI reports and SQL models', 'Power BI dashboards for finance', 'Aged care, night shifts',
+               'Low latency trading in C++', None],
+    'job_ad_text': [None, None, 'Nurse for our aged care home', None, 'SQL, Python and Power BI reporting'],
+})
+
+
+def test_tokenize():
+    assert tokenize('C++ and C# for the R&D team') == ['c++', 'c#', 'r', 'd', 'team']
+    assert tokenize(None) == []
+
+
+def test_similarity_index_incremental_updates_match_a_full_build(tmp_path):
+    index = SimilarityIndex()
+    assert index.add(JOBS.iloc[:3]) == 3
+    assert index.add({'jobs_wide': JOBS.iloc[2:]}) == 3
+    assert len(index) == 5 and 3 in index
+
+    full = SimilarityIndex()
+    full.add(JOBS)
+    np.testing.assert_allclose(index.similar(1, k=4).similarity, full.similar(1, k=4).similarity, rtol=1e-6)
+
+    # the Power BI jobs first, the job itself and the jobs sharing no term are left out
+    result = index.similar(1, k=10)
+    assert result.job_id.tolist()[:2] == [2, 5]
+    assert 1 not in result.job_id.tolist() and 3 not in result.job_id.tolist()
+    assert (result.similarity.diff().dropna() <= 0).all() and result.similarity.between(0, 1).all()
+    assert index.search('c++ trading', k=3).job_id.tolist() == [4]
+    assert index.search('unknown words', k=3).empty
+
+    # a removed job is not returned, a replaced job gets its new text
+    assert index.remove([2, 99]) == 1
+    assert 2 not in index.similar(1).job_id.tolist()
+    index.add(pd.DataFrame({'job_id': [3], 'title': ['Power BI Report Writer'], 'teaser': ['Power BI']}))
+    assert index.similar(3, k=1).job_id.tolist() == [1]
+    with pytest.raises(KeyError):
+        index.similar(2)
+
+    index.save(str(tmp_path / 'similarity.npz'))
+    loaded = SimilarityIndex.load(str(tmp_path / 'similarity.npz'))
+    assert loaded.terms == index.terms and loaded.job_ids.tolist() == index.job_ids.tolist()
+    pd.testing.assert_frame_equal(loaded.similar(1), index.similar(1))
+
+
+def test_similarity_index_from_get_all_dfs(fake_seek):
+    from au_nz_jobs import Jobs
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1, title='Data Engineer', teaser='Spark pipelines'),
+                                            make_raw_job(2, title='Data Engineer', teaser='Airflow and Spark'),
+                                            make_raw_job(3, title='Nurse', teaser='Aged care')])
+
+    index = SimilarityIndex()
+    index.add(Jobs(['data'], ['Sydney']).get_all_dfs(date_range=3, n_processes=1))
+    assert index.similar(1, k=1).job_id.tolist() == [2]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""Tests for the multi-site crawling of `au_nz_jobs.downloader`."""
+
+import threading
+
+import pytest
+
+from au_nz_jobs.downloader.sites import location_site
+from tests.conftest import make_raw_job
+
+
+def test_location_site():
+    assert location_site('All New Zealand') == 'NZ'
+    assert location_site('Auckland') == 'NZ'
+    assert location_site('Auckland Central, Auckland') == 'NZ'
+    assert location_site('Sydney') == 'AU'
+    assert location_site('All Australia') == 'AU'
+    # the where values of SEEK
+    assert location_site('All Auckland') == 'NZ'
+    assert location_site('All Sydney NSW') == 'AU'
+
+
+@pytest.mark.parametrize('location', ['Wellington', 'North Shore', 'Hastings', 'Canterbury', 'Hamilton',
+                                      'Northland'])
+def test_ambiguous_locations_are_searched_in_australia(location):
+    with pytest.warns(UserWarning, match="{'NZ'"):
+        assert location_site(location) == 'AU'
+
+
+def test_sites_are_searched_side_by_side_and_merged(fake_seek, monkeypatch):
+    from au_nz_jobs import Jobs
+    from au_nz_jobs.downloader import downloader
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2, salary='$90k')])
+    fake_seek.add_search('data', 'Auckland', [make_raw_job(2, location='Auckland'),
+                                              make_raw_job(3, location='Auckland', salary='$80k')])
+
+    # the first search of each site waits for the other site, it would time out if the sites were searched in turn
+    barrier = threading.Barrier(2, timeout=5)
+    waiting = set()
+    get = downloader.requests.Session.get
+
+    def get_together(session, url, params=None, **kwargs):
+        if params is not None and params['siteKey'] not in waiting:
+            waiting.add(params['siteKey'])
+            barrier.wait()
+        return get(session, url, params=params, **kwargs)
+
+    monkeypatch.setattr(downloader.requests.Session, 'get', get_together)
+
+    jobs = Jobs(['data'], ['Sydney', 'Auckland'])
+    df = jobs.download(date_range=3)
+
+    # job 2 is listed on both sites, it is kept once, from the first search
+    assert df.set_index('id').site.to_dict() == {1: 'AU', 2: 'AU', 3: 'NZ'}
+    site_keys = {(url, params['siteKey']) for url, params in fake_seek.requests if params is not None}
+    assert site_keys == {('https://www.seek.com.au/api/chalice-search/search', 'AU-Main'),
+                         ('https://www.seek.co.nz/api/chalice-search/search', 'NZ-Main')}
+
+    # the salaries without a currency are in the currency of their site
+    df_dict = jobs.get_all_dfs(date_range=3)
+    assert df_dict['jobs'].set_index('job_id').salary_currency.to_dict() == {1: 'AUD', 2: 'AUD', 3: 'NZD'}
+
+
+def test_explicit_site_routing():
+    from au_nz_jobs import Jobs
+
+    jobs = Jobs(['data'], {'NZ': ['Wellington'], 'AU': ['Wellington NSW 2820']}, sites={'NZ': {'max_workers': 1}})
+    assert jobs.site_locations == [('Wellington', 'NZ'), ('Wellington NSW 2820', 'AU')]
+    assert jobs.sites['NZ']['max_workers'] == 1
+    assert jobs.sites['NZ']['site_key'] == 'NZ-Main'
+
+    with pytest.raises(ValueError):
+        Jobs(['data'], {'UK': ['London']})
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+"""Tests for the memoized stages of `au_nz_jobs.downloader`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from au_nz_jobs.downloader.stages import StageGraph, _freeze, stage
+from tests.conftest import make_raw_job
+
+
+class Pipeline:
+    def __init__(self):
+        self.keywords = ['data']
+        self.check_words = None
+        self.calls = []
+        self.stages = StageGraph(self)
+
+    @stage(params=['keywords'])
+    def _search(self):
+        self.calls.append('search')
+        return list(self.keywords)
+
+    @stage(inputs=['_search'], params=['check_words'])
+    def _checked(self):
+        self.calls.append('checked')
+        return [keyword for keyword in self._search() if self.check_words is None or keyword in self.check_words]
+
+
+def test_stage_graph_only_computes_the_changed_stages():
+    pipeline = Pipeline()
+    assert pipeline._checked() == ['data']
+    assert pipeline._checked() == ['data']
+    assert pipeline.calls == ['search', 'checked']
+
+    # a param compared by value, only the stage reading it runs again
+    pipeline.check_words = ['python']
+    assert pipeline._checked() == []
+    pipeline.check_words = ['python']
+    assert pipeline.stages.is_valid('_checked')
+    assert pipeline.calls == ['search', 'checked', 'checked']
+
+    # a change upstream runs the downstream stages again
+    pipeline.keywords.append('python')
+    assert not pipeline.stages.is_valid('_checked')
+    assert pipeline._checked() == ['python']
+    pipeline.stages.invalidate('_search')
+    pipeline._checked()
+    assert pipeline.calls == ['search', 'checked', 'checked', 'search', 'checked', 'search', 'checked']
+    assert pipeline.stages.runs('_search') == 3
+
+
+def test_unknown_input():
+    class Broken:
+        @stage(inputs=['_missing'])
+        def _stage(self):
+            pass
+
+    with pytest.raises(ValueError):
+        StageGraph(Broken())
+
+
+def test_freeze_compares_arrays_by_value():
+    values = np.arange(3000)
+    changed = values.copy()
+    changed[1500] = -1
+    # the repr of both arrays is the same, truncated with ...
+    assert repr(values) == repr(changed)
+    assert _freeze(values) != _freeze(changed)
+    assert _freeze(values) == _freeze(values.copy()) == _freeze(pd.Series(values))
+    assert _freeze(pd.DataFrame({'a': values})) != _freeze(pd.DataFrame({'a': changed}))
+
+
+def test_new_check_words_reuse_the_search_and_the_details(fake_seek):
+    from au_nz_jobs import Jobs
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1), make_raw_job(2, title='Python Engineer', teaser='Apps')])
+
+    jobs = Jobs(['data'], ['Sydney'])
+    df_dict = jobs.get_all_dfs(date_range=3, check_words=['data'], n_processes=1)
+    # the same arguments reuse the memoized dataframes, changing the ones returned does not change them
+    df_dict['jobs'].drop(columns=['title'], inplace=True)
+    df_dict['jobs_wide'].loc[0, 'teaser'] = 'changed'
+    jobs.classification_df.drop(index=0, inplace=True)
+    jobs.jobs_details_df.drop(columns=['title'], inplace=True)
+    df_dict = jobs.get_all_dfs(date_range=3, check_words=['data'], n_processes=1)
+    assert jobs.stages.runs('_all_dfs') == 1
+    assert 'title' in df_dict['jobs'].columns
+    assert df_dict['jobs_wide'].teaser.tolist() == ['Join our data team', 'Apps']
+    assert len(df_dict['classification']) == 1
+    assert 'title' in jobs.jobs_details_df.columns
+    with pytest.raises(AttributeError):
+        jobs.classification_df = None
+    assert df_dict['jobs'].job_ad_details.notna().tolist() == [True, False]
+    # the job without details has no has_role_requirements
+    assert df_dict['jobs'].has_role_requirements.tolist() == [False, pd.NA]
+    n_requests = len(fake_seek.requests)
+
+    # only the details of job 2 are downloaded, the search is not run again
+    df_dict = jobs.get_all_dfs(check_words=['data', 'python'], n_processes=1)
+    assert [url.rsplit('/', 1)[-1] for url, params in fake_seek.requests[n_requests:]] == ['2']
+    assert df_dict['jobs'].job_ad_details.notna().tolist() == [True, True]
+    assert jobs.stages.runs('_jobs_cleaned_df') == 1
+
+    # without details, the jobs keep the detail columns
+    df_dict = jobs.get_all_dfs(check_words=['data'], if_download_details=False, n_processes=1)
+    assert df_dict['jobs'].expiry_date.isna().all()
+    assert df_dict['jobs'].has_role_requirements.isna().all()
+    assert len(fake_seek.requests) == n_requests + 1
+
+    # a new search
+    jobs.keywords = ['data', 'python']
+    assert not jobs.if_downloaded
+    jobs.download(date_range=3)
+    assert jobs.stages.runs('_search') == 2
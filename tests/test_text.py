@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""Tests for `au_nz_jobs.downloader.text`."""
+
+import pandas as pd
+
+from au_nz_jobs.downloader.text import html_to_text, process_details, term_stats
+from tests.conftest import make_job_details, make_raw_job
+
+
+def test_html_to_text():
+    html = '<p>We use <b>Python</b>&nbsp;&amp; SQL.</p><ul><li>R&amp;D</li><li>C#</li></ul><style>p {}</style>'
+    assert html_to_text(html) == 'We use Python & SQL.\nR&D\nC#'
+    assert html_to_text(None) is None
+
+
+def test_process_details_in_a_pool_matches_a_single_process():
+    html = pd.Series(['<p>Python, SQL and Power BI</p>', None, '<p>C++ and C# for R&amp;D</p>', '<p>python</p>'] * 3,
+                     index=range(100, 112))
+
+    texts, matrix = process_details(html, vocabulary=['python', 'sql', 'power bi', 'c++', 'c#', 'r'],
+                                    n_processes=2, chunk_size=5)
+    texts_single, matrix_single = process_details(html, vocabulary=['python', 'sql', 'power bi', 'c++', 'c#', 'r'],
+                                                  n_processes=1, chunk_size=5)
+
+    assert texts.index.tolist() == html.index.tolist()
+    assert texts.tolist() == texts_single.tolist()
+    assert (matrix != matrix_single).nnz == 0
+    assert matrix.toarray()[:4].tolist() == [[1, 1, 1, 0, 0, 0], [0] * 6, [0, 0, 0, 1, 1, 0], [1, 0, 0, 0, 0, 0]]
+    assert term_stats(matrix, ['python', 'sql', 'power bi', 'c++', 'c#', 'r']).term.tolist()[0] == 'python'
+
+
+def test_check_words_in_job_ad(fake_seek):
+    from au_nz_jobs import Jobs
+
+    fake_seek.add_search('data', 'Sydney', [make_raw_job(1, title='Data Engineer', teaser='Build things')])
+    fake_seek.details['1'] = make_job_details(1, job_ad_details='<p>Our <b>Tableau</b> stack</p>')
+
+    jobs = Jobs(['data'], ['Sydney'])
+    df_dict = jobs.get_all_dfs(date_range=3, check_words=['data', 'tableau'], n_processes=1)
+
+    assert sorted(df_dict['jobs'].check_words_found[0]) == ['data', 'tableau']
+    assert df_dict['jobs'].job_ad_text.tolist() == ['Our Tableau stack']
+    assert jobs.skill_stats().term.tolist() == ['tableau']